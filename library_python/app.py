@@ -5,17 +5,50 @@ Refactored with Clean Architecture:
 - Extensions module to prevent circular imports
 - PEP 8 compliance with type hints
 - English comments and docstrings
+
+Production: gunicorn -k eventlet -w 1 app:app (one worker per process;
+scale out with more processes behind the Redis message queue), with the
+open-file limit raised for many sockets (ulimit -n 65535).
 """
+from config.config import Config
+
+# Green-thread patching must happen before any other module is imported
+if Config.SOCKETIO_ASYNC_MODE == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+
 import atexit
+from typing import Dict, Optional
 
-from flask import Flask, g, session
+import redis
+from flask import Flask, g, render_template, request, session
+from flask_socketio import emit, join_room
 
-from config.config import Config
-from extensions import socketio
-from models import Guest, Notification, User, init_db
-from models.chat_message import ChatMessage
+from extensions import (
+    OrjsonProvider, cache, compress, online_users, server_session, socketio,
+    typing_throttle
+)
+from models import ChatMessage, Guest, UnreadCounts, User, close_db, init_db
 from routes import admin_bp, api_bp, auth_bp, main_bp, staff_bp, user_bp
-from scheduled_tasks import shutdown_scheduler, start_scheduler
+from scheduled_tasks import install_sigterm_handler, shutdown_scheduler, start_scheduler
+
+# Shared template context for anonymous visitors (nothing to count)
+_GUEST = Guest()
+_GUEST_CONTEXT = {
+    'current_user': _GUEST,
+    'unread_messages': 0,
+    'unread_notifications': 0
+}
+
+# Pre-rendered guest error pages, keyed by status code
+_ERROR_PAGES: Dict[int, str] = {}
+
+# Lets nginx/CDN serve repeated guest error pages without reaching Python;
+# 500s are kept short so a recovered backend is visible quickly
+_ERROR_CACHE_CONTROL: Dict[int, str] = {
+    404: 'public, max-age=300',
+    500: 'public, max-age=10'
+}
 
 
 def create_app() -> Flask:
@@ -26,9 +59,19 @@ def create_app() -> Flask:
     """
     app = Flask(__name__)
     app.config.from_object(Config)
+    app.json = OrjsonProvider(app)
     
     # Initialize extensions
     socketio.init_app(app)
+    cache.init_app(app)
+    compress.init_app(app)
+    
+    # Keep session data in Redis; the cookie only carries the session id
+    if Config.REDIS_URL:
+        app.config['SESSION_TYPE'] = 'redis'
+        app.config['SESSION_REDIS'] = redis.Redis.from_url(Config.REDIS_URL)
+        app.config['SESSION_USE_SIGNER'] = True
+        server_session.init_app(app)
     
     # Initialize database
     with app.app_context():
@@ -42,99 +85,181 @@ def create_app() -> Flask:
     app.register_blueprint(admin_bp, url_prefix='/admin')
     app.register_blueprint(api_bp, url_prefix='/api')
     
-    # Register context processors and hooks
+    # Register context processors, hooks and error handlers
     register_hooks(app)
-    
-    # Start background tasks
-    start_scheduler(app)
-    atexit.register(shutdown_scheduler)
+    prerender_error_pages(app)
     
     return app
 
 
 def register_hooks(app: Flask) -> None:
-    """Register application hooks and context processors.
+    """Register application hooks, context processors and error handlers.
+    
+    The request's database connection is closed on app context teardown.
+    
+    Args:
+        app: Flask application instance.
+    """
+    app.before_request(load_logged_in_user)
+    app.teardown_appcontext(close_db)
+    app.context_processor(inject_context)
+    app.register_error_handler(404, not_found)
+    app.register_error_handler(500, internal_error)
+
+
+def load_logged_in_user() -> None:
+    """Load current user from the session snapshot before each request."""
+    if session.get('user_id') is None:
+        g.user = _GUEST
+    else:
+        g.user = User.load_for_session(session)
+
+
+def inject_context() -> dict:
+    """Inject global context variables into all templates.
+    
+    Returns:
+        Dictionary of context variables.
+    """
+    if not g.user.is_authenticated:
+        return _GUEST_CONTEXT
+
+    unread_count, notification_count = UnreadCounts.get_for_user(g.user.id)
+
+    return {
+        'current_user': g.user,
+        'unread_messages': unread_count,
+        'unread_notifications': notification_count
+    }
+
+
+def prerender_error_pages(app: Flask) -> None:
+    """Render the guest version of the 404/500 pages once at startup.
     
     Args:
         app: Flask application instance.
     """
-    @app.before_request
-    def load_logged_in_user() -> None:
-        """Load current user from session before each request."""
-        user_id = session.get('user_id')
-        if user_id is None:
-            g.user = Guest()
-        else:
-            g.user = User.get_user_or_guest(user_id)
-
-    @app.context_processor
-    def inject_context() -> dict:
-        """Inject global context variables into all templates.
+    with app.test_request_context():
+        g.user = _GUEST
+        for code in (404, 500):
+            _ERROR_PAGES[code] = render_template(f'errors/{code}.html')
+
+
+def render_error_page(code: int) -> tuple:
+    """Serve an error page, using the pre-rendered copy for guests.
+    
+    Logged-in users and requests with pending flash messages get a fresh
+    render, since the layout shows their name and flashes. Only the shared
+    guest copy is marked cacheable by proxies.
+    
+    Args:
+        code: HTTP status code (404 or 500).
         
-        Returns:
-            Dictionary of context variables.
-        """
-        unread_count = 0
-        notification_count = 0
-
-        if g.user and hasattr(g.user, 'id') and g.user.id:
-            unread_count = ChatMessage.get_unread_count(g.user.id)
-            notification_count = Notification.get_unread_count(g.user.id)
-
-        return {
-            'current_user': g.user,
-            'unread_messages': unread_count,
-            'unread_notifications': notification_count
+    Returns:
+        Error page HTML, status code and headers.
+    """
+    user = g.get('user')
+    if (user is None or not user.is_authenticated) and '_flashes' not in session:
+        return _ERROR_PAGES[code], code, {
+            'Cache-Control': _ERROR_CACHE_CONTROL[code],
+            'Content-Type': 'text/html; charset=utf-8'
         }
+    return render_template(f'errors/{code}.html'), code, {
+        'Cache-Control': 'private, no-cache'
+    }
+
 
-    @app.errorhandler(404)
-    def not_found(error) -> tuple:
-        """Handle 404 errors.
+def not_found(error) -> tuple:
+    """Handle 404 errors.
+    
+    Args:
+        error: The error object.
         
-        Args:
-            error: The error object.
-            
-        Returns:
-            Rendered error page and 404 status code.
-        """
-        from flask import render_template
-        return render_template('errors/404.html'), 404
-
-    @app.errorhandler(500)
-    def internal_error(error) -> tuple:
-        """Handle 500 errors.
+    Returns:
+        Rendered error page, 404 status code and headers.
+    """
+    return render_error_page(404)
+
+
+def internal_error(error) -> tuple:
+    """Handle 500 errors.
+    
+    Args:
+        error: The error object.
         
-        Args:
-            error: The error object.
-            
-        Returns:
-            Rendered error page and 500 status code.
-        """
-        from flask import render_template
-        return render_template('errors/500.html'), 500
+    Returns:
+        Rendered error page, 500 status code and headers.
+    """
+    return render_error_page(500)
 
 
 # Create app instance
 app = create_app()
 
-# Online users tracking for chat feature
-online_users = {}
+# Start background tasks in the process designated to run them
+# (RUN_SCHEDULER=1 and, with Redis, holding the scheduler leader lock)
+if Config.RUN_SCHEDULER:
+    start_scheduler(app)
+    atexit.register(shutdown_scheduler)
+    install_sigterm_handler()
+
+# Write-behind persistence for chat messages sent over SocketIO
+socketio.start_background_task(ChatMessage.run_persist_worker, app)
+
+
+def user_room(user_id: str) -> str:
+    """Get the SocketIO room name that all connections of a user join.
+    
+    Args:
+        user_id: User ID.
+        
+    Returns:
+        Room name.
+    """
+    return f'user:{user_id}'
+
+
+def parse_receiver_id(data) -> Optional[str]:
+    """Validate and normalize the receiver_id of a SocketIO event payload.
+    
+    User IDs are UUID strings, so clients sending other JSON types (or an
+    empty value) are rejected up front instead of missing every lookup.
+    
+    Args:
+        data: Event payload sent by the client.
+        
+    Returns:
+        Receiver ID string, or None if the payload is malformed.
+    """
+    if not isinstance(data, dict):
+        return None
+    receiver_id = data.get('receiver_id')
+    if not isinstance(receiver_id, (str, int)) or isinstance(receiver_id, bool):
+        return None
+    receiver_id = str(receiver_id).strip()
+    return receiver_id or None
 
 
 # SocketIO event handlers
 @socketio.on('connect')
 def handle_connect() -> None:
-    """Handle client connection to SocketIO."""
-    from flask import request
+    """Handle client connection to SocketIO.
+    
+    Each connection joins the ``user:{id}`` room, so messages reach every
+    open tab/device of that user.
+    """
     if 'user_id' in session:
-        online_users[session['user_id']] = request.sid
+        join_room(user_room(session['user_id']))
+        online_users.set(session['user_id'], request.sid)
 
 
 @socketio.on('disconnect')
 def handle_disconnect() -> None:
-    """Handle client disconnection from SocketIO."""
-    if 'user_id' in session and session['user_id'] in online_users:
-        del online_users[session['user_id']]
+    """Handle client disconnection from SocketIO.
+    
+    Resolved by sid, so cleanup also works when the session is gone.
+    """
+    online_users.remove_sid(request.sid)
 
 
 @socketio.on('send_message')
@@ -144,53 +269,68 @@ def handle_send_message(data: dict) -> None:
     Args:
         data: Dictionary containing message data (receiver_id, message).
     """
-    from flask import request
-    from flask_socketio import emit
-    
     if 'user_id' not in session:
         return
 
-    sender_id = session['user_id']
-    receiver_id = data.get('receiver_id')
-    message_text = data.get('message', '')
+    receiver_id = parse_receiver_id(data)
+    if not receiver_id:
+        return
 
-    chat_message, _ = ChatMessage.send_message(sender_id, receiver_id, message_text)
-    if not chat_message:
+    message_text = data.get('message', '')
+    if not isinstance(message_text, str):
         return
 
-    payload = chat_message.to_dict()
+    sender_id = session['user_id']
 
-    # Send to sender
-    emit('new_message', payload, room=request.sid)
+    # Persisted by the background worker so the emit is not blocked on disk
+    chat_message, _ = ChatMessage.send_message(
+        sender_id, receiver_id, message_text, write_behind=True
+    )
+    if not chat_message:
+        return
 
-    # Send to receiver if online
-    receiver_sid = online_users.get(receiver_id)
-    if receiver_sid:
-        emit('new_message', payload, room=receiver_sid)
+    # One emit to both rooms: the packet is encoded (and, with the Redis
+    # queue, published) once for all of the sender's and receiver's
+    # connections, and a socket in both rooms only receives it once
+    emit('new_message', chat_message.to_dict(),
+         to=[user_room(sender_id), user_room(receiver_id)])
 
 
 @socketio.on('typing')
 def handle_typing(data: dict) -> None:
     """Handle typing indicators.
     
+    Clients send one event per keystroke; ``is_typing=True`` is forwarded
+    at most once per throttle window, ``is_typing=False`` always is.
+    
     Args:
         data: Dictionary containing typing status (receiver_id, is_typing).
     """
-    from flask_socketio import emit
-    
     if 'user_id' not in session:
         return
 
-    receiver_id = data.get('receiver_id')
-    is_typing = data.get('is_typing', False)
-    receiver_sid = online_users.get(receiver_id)
-    
-    if receiver_sid:
-        emit('typing', {
-            'sender_id': session['user_id'],
-            'is_typing': is_typing,
-        }, room=receiver_sid)
+    receiver_id = parse_receiver_id(data)
+    if not receiver_id:
+        return
+
+    sender_id = session['user_id']
+    is_typing = bool(data.get('is_typing', False))
+    if not is_typing:
+        typing_throttle.reset(sender_id, receiver_id)
+    elif not typing_throttle.allow(sender_id, receiver_id):
+        return
+
+    emit('typing', {
+        'sender_id': sender_id,
+        'is_typing': is_typing,
+    }, room=user_room(receiver_id))
 
 
 if __name__ == '__main__':
-    socketio.run(app, debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    socketio.run(
+        app,
+        debug=Config.DEBUG,
+        use_reloader=Config.DEBUG,
+        host='0.0.0.0',
+        port=5000
+    )
\ No newline at end of file
@@ -7,17 +7,33 @@ This script scans all templates to find url_for() calls and reports:
 
 Usage:
     python check_templates.py [--templates-dir DIR]
+
+Scanning uses Hyperscan when the optional ``hyperscan`` package is
+installed, and Python's re module otherwise.
 """
 import argparse
+import functools
+import io
+import mmap
+import os
 import re
+import sys
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Set, Tuple
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Set, Tuple
+
+try:
+    import hyperscan
+except ImportError:  # Optional: fall back to the re module
+    hyperscan = None
 
 
 # Import route mappings from update script
 # In real use, you'd import from update_templates.py
-ROUTE_MAPPINGS = {
+# Read-only view: the table is never modified after import
+ROUTE_MAPPINGS: Mapping[str, Tuple[str, str]] = MappingProxyType({
     'login': ('auth', 'login'),
     'register': ('auth', 'register'),
     'logout': ('auth', 'logout'),
@@ -67,7 +83,86 @@ ROUTE_MAPPINGS = {
     'submit_review': ('api', 'submit_review'),
     'edit_review': ('api', 'edit_review'),
     'delete_review': ('api', 'delete_review'),
-}
+})
+
+# Route names with a known blueprint mapping, for fast membership tests
+_MAPPED_ROUTES = frozenset(ROUTE_MAPPINGS)
+
+# Matches url_for('route_name') or url_for("route_name")
+_URL_FOR_RE = re.compile(r"url_for\(\s*['\"]([^'\"]+)['\"]")
+# Same pattern for scanning memory-mapped files without decoding them
+_URL_FOR_RE_B = re.compile(rb"url_for\(\s*['\"]([^'\"]+)['\"]")
+
+# File extensions treated as templates
+TEMPLATE_EXTENSIONS = frozenset({'.html', '.jinja2', '.j2'})
+
+# Below this many templates, starting worker processes costs more than it saves
+PARALLEL_MIN_FILES = 64
+
+# Compiled Hyperscan database, built lazily once per (worker) process
+_hs_database = None
+
+
+def _find_routes(data) -> List[bytes]:
+    """Find url_for() route names in a bytes-like buffer.
+    
+    Uses Hyperscan's DFA engine when installed, otherwise _URL_FOR_RE_B.
+    Hyperscan reports match offsets rather than groups, so the route name
+    is sliced out of each match: it ends just before the closing quote and
+    starts after the last quote preceding it.
+    
+    Args:
+        data: Template content (bytes or mmap).
+        
+    Returns:
+        Route names as bytes, in order of appearance.
+    """
+    global _hs_database
+    if hyperscan is None:
+        return _URL_FOR_RE_B.findall(data)
+    
+    if _hs_database is None:
+        _hs_database = hyperscan.Database()
+        _hs_database.compile(
+            expressions=[_URL_FOR_RE_B.pattern],
+            ids=[0],
+            elements=1,
+            flags=[hyperscan.HS_FLAG_SOM_LEFTMOST]
+        )
+    
+    routes = []
+    
+    def on_match(pattern_id, start, end, flags, context):
+        body = data[start:end - 1]
+        quote = max(body.rfind(b"'"), body.rfind(b'"'))
+        routes.append(body[quote + 1:])
+    
+    _hs_database.scan(data, match_event_handler=on_match)
+    return routes
+
+
+def _scan(path: str) -> Tuple[List[str], Optional[str]]:
+    """Extract url_for() route names from a template file.
+    
+    Module-level so it can run in ProcessPoolExecutor workers. The file is
+    memory-mapped and searched as bytes, so it is neither read into a
+    string nor decoded; only the matched names are.
+    
+    Args:
+        path: Path to template file.
+        
+    Returns:
+        Tuple of (route names, error message or None).
+    """
+    try:
+        with open(path, 'rb') as f:
+            # mmap cannot map an empty file
+            if f.seek(0, 2) == 0:
+                return [], None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return [m.decode('utf-8') for m in _find_routes(mm)], None
+    except Exception as e:
+        return [], str(e)
 
 
 class TemplateChecker:
@@ -94,10 +189,13 @@ class TemplateChecker:
         Returns:
             List of template file paths.
         """
-        template_files = []
-        for ext in ['*.html', '*.jinja2', '*.j2']:
-            template_files.extend(self.templates_dir.rglob(ext))
-        return template_files
+        # One walk over the tree instead of one rglob() per extension
+        return [
+            Path(dirpath) / filename
+            for dirpath, _, filenames in os.walk(self.templates_dir)
+            for filename in filenames
+            if os.path.splitext(filename)[1] in TEMPLATE_EXTENSIONS
+        ]
     
     def extract_url_for_calls(self, content: str) -> List[str]:
         """Extract all url_for() route names from content.
@@ -108,26 +206,21 @@ class TemplateChecker:
         Returns:
             List of route names found in url_for() calls.
         """
-        # Pattern to match url_for('route_name') or url_for("route_name")
-        pattern = r"url_for\(\s*['\"]([^'\"]+)['\"]"
-        matches = re.findall(pattern, content)
-        return matches
+        return _URL_FOR_RE.findall(content)
     
-    def categorize_route(self, route: str, file_path: Path) -> None:
+    def categorize_route(self, route: str, relative_path: str) -> None:
         """Categorize a route as updated, needs update, or unmapped.
         
         Args:
             route: Route name from url_for().
-            file_path: Path to template file.
+            relative_path: Template path relative to the templates directory.
         """
-        relative_path = str(file_path.relative_to(self.templates_dir))
-        
         # Check if already using blueprint syntax (contains a dot)
         if '.' in route:
             self.results['already_updated'][route].append(relative_path)
         
         # Check if in mapping (needs update)
-        elif route in ROUTE_MAPPINGS:
+        elif route in _MAPPED_ROUTES:
             self.results['needs_update'][route].append(relative_path)
         
         # Unknown route (not in mapping)
@@ -140,18 +233,26 @@ class TemplateChecker:
         Args:
             file_path: Path to template file.
         """
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            routes = self.extract_url_for_calls(content)
-            self.results['total_url_for_calls'] += len(routes)
-            
-            for route in routes:
-                self.categorize_route(route, file_path)
-                
-        except Exception as e:
-            print(f"⚠️  Error reading {file_path}: {e}")
+        self.record_routes(file_path, *_scan(str(file_path)))
+    
+    def record_routes(self, file_path: Path, routes: List[str],
+                      error: Optional[str] = None) -> None:
+        """Add the routes scanned from one template file to the results.
+        
+        Args:
+            file_path: Path to template file.
+            routes: Route names found in the file.
+            error: Error message if the file could not be read.
+        """
+        if error is not None:
+            print(f"⚠️  Error reading {file_path}: {error}")
+            return
+        
+        self.results['total_url_for_calls'] += len(routes)
+        relative_path = str(file_path.relative_to(self.templates_dir))
+        # A template calling url_for('x') repeatedly is listed once per route
+        for route in dict.fromkeys(routes):
+            self.categorize_route(route, relative_path)
     
     def run(self) -> None:
         """Run the checker and print results."""
@@ -165,17 +266,32 @@ class TemplateChecker:
         
         print(f"Scanning {len(template_files)} template files...\n")
         
-        for file_path in template_files:
-            self.check_file(file_path)
+        # Files are scanned independently, so large trees are spread over
+        # all cores; results are merged here in the main process
+        if len(template_files) >= PARALLEL_MIN_FILES:
+            with ProcessPoolExecutor() as pool:
+                scans = pool.map(_scan, map(str, template_files), chunksize=32)
+                for file_path, (routes, error) in zip(template_files, scans):
+                    self.record_routes(file_path, routes, error)
+        else:
+            for file_path in template_files:
+                self.check_file(file_path)
         
         # Print results
         self.print_results()
     
     def print_results(self) -> None:
-        """Print detailed results."""
-        print("=" * 70)
-        print("RESULTS")
-        print("=" * 70)
+        """Print detailed results.
+        
+        The report is built in memory and written to stdout in one call
+        rather than flushing line by line.
+        """
+        buf = io.StringIO()
+        out = functools.partial(print, file=buf)
+        
+        out("=" * 70)
+        out("RESULTS")
+        out("=" * 70)
         
         # Summary statistics
         total_routes = (
@@ -184,67 +300,66 @@ class TemplateChecker:
             len(self.results['unmapped'])
         )
         
-        print(f"\nTotal files scanned:       {self.results['total_files']}")
-        print(f"Total url_for() calls:     {self.results['total_url_for_calls']}")
-        print(f"Unique routes found:       {total_routes}")
+        out(f"\nTotal files scanned:       {self.results['total_files']}")
+        out(f"Total url_for() calls:     {self.results['total_url_for_calls']}")
+        out(f"Unique routes found:       {total_routes}")
         
         # Already updated (using blueprint syntax)
         if self.results['already_updated']:
-            print(f"\n✅ ALREADY UPDATED ({len(self.results['already_updated'])} routes)")
-            print("-" * 70)
-            for route in sorted(self.results['already_updated'].keys()):
-                files = self.results['already_updated'][route]
-                print(f"  {route}")
-                print(f"    Used in {len(files)} file(s): {', '.join(files[:3])}")
+            out(f"\n✅ ALREADY UPDATED ({len(self.results['already_updated'])} routes)")
+            out("-" * 70)
+            for route, files in sorted(self.results['already_updated'].items()):
+                out(f"  {route}")
+                out(f"    Used in {len(files)} file(s): {', '.join(files[:3])}")
                 if len(files) > 3:
-                    print(f"    ... and {len(files) - 3} more")
+                    out(f"    ... and {len(files) - 3} more")
         
         # Needs update
         if self.results['needs_update']:
-            print(f"\n⚠️  NEEDS UPDATE ({len(self.results['needs_update'])} routes)")
-            print("-" * 70)
-            for route in sorted(self.results['needs_update'].keys()):
+            out(f"\n⚠️  NEEDS UPDATE ({len(self.results['needs_update'])} routes)")
+            out("-" * 70)
+            for route, files in sorted(self.results['needs_update'].items()):
                 blueprint, new_route = ROUTE_MAPPINGS[route]
-                files = self.results['needs_update'][route]
-                print(f"  '{route}' → '{blueprint}.{new_route}'")
-                print(f"    Found in {len(files)} file(s): {', '.join(files[:3])}")
+                out(f"  '{route}' → '{blueprint}.{new_route}'")
+                out(f"    Found in {len(files)} file(s): {', '.join(files[:3])}")
                 if len(files) > 3:
-                    print(f"    ... and {len(files) - 3} more")
+                    out(f"    ... and {len(files) - 3} more")
         
         # Unmapped routes
         if self.results['unmapped']:
-            print(f"\n❌ UNMAPPED ROUTES ({len(self.results['unmapped'])} routes)")
-            print("-" * 70)
-            print("  These routes were not found in the mapping configuration.")
-            print("  They may need to be added to ROUTE_MAPPINGS.\n")
+            out(f"\n❌ UNMAPPED ROUTES ({len(self.results['unmapped'])} routes)")
+            out("-" * 70)
+            out("  These routes were not found in the mapping configuration.")
+            out("  They may need to be added to ROUTE_MAPPINGS.\n")
             
-            for route in sorted(self.results['unmapped'].keys()):
-                files = self.results['unmapped'][route]
-                print(f"  '{route}'")
-                print(f"    Found in {len(files)} file(s): {', '.join(files[:3])}")
+            for route, files in sorted(self.results['unmapped'].items()):
+                out(f"  '{route}'")
+                out(f"    Found in {len(files)} file(s): {', '.join(files[:3])}")
                 if len(files) > 3:
-                    print(f"    ... and {len(files) - 3} more")
+                    out(f"    ... and {len(files) - 3} more")
         
         # Migration progress
-        print("\n" + "=" * 70)
-        print("MIGRATION PROGRESS")
-        print("=" * 70)
+        out("\n" + "=" * 70)
+        out("MIGRATION PROGRESS")
+        out("=" * 70)
         
         updated_count = len(self.results['already_updated'])
         needs_update_count = len(self.results['needs_update'])
         
         if total_routes > 0:
             progress = (updated_count / total_routes) * 100
-            print(f"\nProgress: {updated_count}/{total_routes} routes updated ({progress:.1f}%)")
+            out(f"\nProgress: {updated_count}/{total_routes} routes updated ({progress:.1f}%)")
             
             if needs_update_count > 0:
-                print(f"\n💡 Run update_templates.py to automatically update {needs_update_count} routes")
+                out(f"\n💡 Run update_templates.py to automatically update {needs_update_count} routes")
             else:
-                print("\n✅ All known routes are using blueprint syntax!")
+                out("\n✅ All known routes are using blueprint syntax!")
         
         if self.results['unmapped']:
-            print(f"\n⚠️  Warning: {len(self.results['unmapped'])} unmapped routes found")
-            print("   These may need to be added to ROUTE_MAPPINGS in update_templates.py")
+            out(f"\n⚠️  Warning: {len(self.results['unmapped'])} unmapped routes found")
+            out("   These may need to be added to ROUTE_MAPPINGS in update_templates.py")
+        
+        sys.stdout.write(buf.getvalue())
 
 
 def main():
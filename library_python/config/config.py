@@ -5,7 +5,11 @@ including database paths, upload settings, and business rules.
 """
 import os
 from datetime import timedelta
-from typing import Set
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+# Project root (library_python/), resolved once for all derived paths
+BASE_DIR: Path = Path(__file__).resolve().parent.parent
 
 
 class Config:
@@ -19,12 +23,18 @@ class Config:
     
     Attributes:
         SECRET_KEY (str): Secret key for session encryption and CSRF protection.
+        DEBUG (bool): Enable the Werkzeug debugger and reloader (development only).
         SESSION_PERMANENT (bool): Whether sessions should be permanent.
         PERMANENT_SESSION_LIFETIME (timedelta): Duration of permanent sessions.
+        REDIS_URL (Optional[str]): Redis connection URL, None to disable Redis.
         DATABASE_PATH (str): Absolute path to SQLite database file.
+        SQLITE_CONNECT_OPTIONS (Dict[str, Any]): Extra sqlite3.connect() options.
+        SQLITE_PRAGMAS (Dict[str, Any]): PRAGMAs applied to every connection.
         UPLOAD_FOLDER (str): Directory path for uploaded files.
         MAX_CONTENT_LENGTH (int): Maximum allowed file size in bytes.
         ALLOWED_EXTENSIONS (Set[str]): Set of allowed file extensions.
+        REVIEWS_PER_PAGE (int): Reviews shown per page on the book detail page.
+        LOG_EXPORT_LIMIT (int): Maximum rows in the system log CSV export.
         MAX_BORROW_LIMIT (int): Maximum books a user can borrow simultaneously.
         BORROW_DURATION_DAYS (int): Default borrow period in days.
         MAX_RENEWAL_COUNT (int): Maximum times a book can be renewed.
@@ -36,21 +46,82 @@ class Config:
     # Secret key for session management and security
     SECRET_KEY: str = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     
+    # Debugger/reloader only for local development (FLASK_ENV=development)
+    DEBUG: bool = os.environ.get('FLASK_ENV') == 'development'
+    
     # Session configuration
     SESSION_PERMANENT: bool = False
     PERMANENT_SESSION_LIFETIME: timedelta = timedelta(days=7)
+    # Only send Set-Cookie when the session changes, not on every response
+    SESSION_REFRESH_EACH_REQUEST: bool = False
     
-    # Database configuration
-    DATABASE_PATH: str = os.path.join(
-        os.path.dirname(os.path.dirname(__file__)), 'data', 'library.db'
+    # Redis configuration (shared presence / SocketIO message queue).
+    # Leave unset for single-process development; in-memory fallbacks are used.
+    REDIS_URL: Optional[str] = os.environ.get('REDIS_URL')
+    PRESENCE_TTL_SECONDS: int = 3600  # Expiry for per-user presence keys
+    USER_CACHE_TTL_SECONDS: int = 60  # Expiry for cached logged-in user rows
+    UNREAD_CACHE_TTL_SECONDS: int = 300  # Safety expiry for cached unread counts
+    TYPING_THROTTLE_MS: int = 1500  # At most one typing indicator per window
+    CHAT_PERSIST_RETRIES: int = 3  # Retries of a failed write-behind chat batch
+    CHAT_PERSIST_RETRY_DELAY_SECONDS: float = 0.5  # First retry delay, doubled each time
+    
+    # Flask-Caching: Redis shared by all workers, per-process memory otherwise
+    CACHE_TYPE: str = 'RedisCache' if REDIS_URL else 'SimpleCache'
+    CACHE_REDIS_URL: Optional[str] = REDIS_URL
+    CACHE_DEFAULT_TIMEOUT: int = 300
+    HOME_CACHE_TTL_SECONDS: int = 300  # Home page book lists
+    CATEGORIES_CACHE_TTL_SECONDS: int = 3600  # Category list on search page
+    SEARCH_CACHE_TTL_SECONDS: int = 60  # Book IDs matching a search
+    ADMIN_STATS_CACHE_TTL_SECONDS: int = 10  # Admin dashboard statistics
+    
+    # Flask-Compress: Brotli when the client accepts it, gzip otherwise
+    COMPRESS_MIMETYPES: List[str] = [
+        'text/html', 'text/css', 'text/csv',
+        'application/json', 'application/javascript'
+    ]
+    COMPRESS_MIN_SIZE: int = 500  # Smaller bodies are not worth compressing
+    COMPRESS_ALGORITHM: List[str] = ['br', 'gzip']
+    
+    # SocketIO server: 'eventlet' serves thousands of sockets per process;
+    # set SOCKETIO_ASYNC_MODE=threading to debug without green threads.
+    SOCKETIO_ASYNC_MODE: str = os.environ.get('SOCKETIO_ASYNC_MODE', 'eventlet')
+    # Origins allowed to open SocketIO connections (comma-separated
+    # CORS_ORIGINS); None accepts only the page's own origin, which also
+    # covers proxies/tunnels that send X-Forwarded-Proto/Host
+    CORS_ORIGINS: Optional[List[str]] = (
+        [o.strip() for o in os.environ['CORS_ORIGINS'].split(',') if o.strip()]
+        if os.environ.get('CORS_ORIGINS') else None
     )
     
+    # Background scheduler: enable on exactly one process per deployment
+    RUN_SCHEDULER: bool = os.environ.get('RUN_SCHEDULER', '1') == '1'
+    SCHEDULER_LOCK_TTL_SECONDS: int = 30  # Leader lease, renewed by heartbeat
+    
+    # Database configuration
+    DATABASE_PATH: str = str(BASE_DIR / 'data' / 'library.db')
+    # sqlite3.connect() options: wait up to 30s for a competing writer instead
+    # of failing with "database is locked", and keep more prepared statements.
+    SQLITE_CONNECT_OPTIONS: Dict[str, Any] = {
+        'timeout': 30.0,
+        'cached_statements': 256,
+    }
+    
+    # Per-connection PRAGMAs. The database itself is switched to WAL in
+    # init_db(), so readers no longer block on a committing writer; with WAL,
+    # synchronous=NORMAL only fsyncs at checkpoints and stays crash-safe.
+    SQLITE_PRAGMAS: Dict[str, Any] = {
+        'synchronous': 'NORMAL',
+        'temp_store': 'MEMORY',
+        'mmap_size': 256 * 1024 * 1024,  # Memory-map up to 256MB of the file
+        'cache_size': -64 * 1024,  # Negative means KiB: 64MB page cache
+    }
+    
     # Upload configuration
-    UPLOAD_FOLDER: str = os.path.join(
-        os.path.dirname(os.path.dirname(__file__)), 'static', 'uploads'
-    )
+    UPLOAD_FOLDER: str = str(BASE_DIR / 'static' / 'uploads')
     MAX_CONTENT_LENGTH: int = 16 * 1024 * 1024  # 16MB max file size
     ALLOWED_EXTENSIONS: Set[str] = {'png', 'jpg', 'jpeg', 'gif'}
+    REVIEWS_PER_PAGE: int = 20  # Reviews shown per page on book detail
+    LOG_EXPORT_LIMIT: int = 100000  # Max rows in the streamed system log CSV
     
     # Library system business rules
     MAX_BORROW_LIMIT: int = 5  # Maximum books per user
@@ -3,19 +3,216 @@
 This module initializes all Flask extensions to prevent circular imports.
 Extensions are initialized here and imported into app.py and other modules.
 """
-from typing import Optional
+import json
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
 
+import orjson
+import redis
+from flask.json.provider import JSONProvider
+from flask_caching import Cache
+from flask_compress import Compress
+from flask_session import Session
 from flask_socketio import SocketIO
 
+from config.config import Config
+
+# Shared Redis client (None when REDIS_URL is not configured)
+redis_client: Optional[redis.Redis] = (
+    redis.Redis.from_url(Config.REDIS_URL, decode_responses=True)
+    if Config.REDIS_URL else None
+)
+
+class OrjsonSerializer:
+    """json-module compatible wrapper around orjson for SocketIO packets."""
+
+    @staticmethod
+    def dumps(obj: Any, **kwargs) -> str:
+        return orjson.dumps(obj, default=str).decode()
+
+    @staticmethod
+    def loads(s, **kwargs) -> Any:
+        return orjson.loads(s)
+
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson, used by jsonify() and request.json.
+
+    Non-string dict keys (e.g. rating distributions keyed by star) are
+    allowed like with the stdlib encoder; unknown types fall back to str().
+    Calls passing json-module options (such as the session serializer's
+    object_hook) are delegated to the stdlib, which orjson cannot honour.
+    """
+
+    OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj: Any, **kwargs) -> str:
+        if kwargs:
+            return json.dumps(obj, default=str, **kwargs)
+        return orjson.dumps(obj, default=str, option=self.OPTIONS).decode()
+
+    def loads(self, s, **kwargs) -> Any:
+        if kwargs:
+            return json.loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes straight to the response, skipping the decode
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=str, option=self.OPTIONS),
+            mimetype='application/json'
+        )
+
+
 # Initialize SocketIO without app binding
-# Will be bound to app in create_app() function
+# Will be bound to app in create_app() function.
+# With a message queue, emits are routed across all workers via Redis pub/sub.
 socketio: SocketIO = SocketIO(
-    cors_allowed_origins="*",
-    async_mode='threading'
+    cors_allowed_origins=Config.CORS_ORIGINS,
+    async_mode=Config.SOCKETIO_ASYNC_MODE,
+    message_queue=Config.REDIS_URL,
+    json=OrjsonSerializer
 )
 
+# Server-side session store, bound in create_app() when Redis is configured
+server_session: Session = Session()
+
+# Response/query cache (CACHE_* settings in Config), bound in create_app()
+cache: Cache = Cache()
+
+# gzip/Brotli response compression (COMPRESS_* settings in Config)
+compress: Compress = Compress()
+
+
+class PresenceStore:
+    """Tracks which SocketIO session id each online user is connected with.
+
+    Backed by the ``ws:presence`` Redis hash (user_id -> sid) and its
+    ``ws:presence:sids`` reverse index (sid -> user_id) so every worker
+    shares the same view and a disconnect can be resolved from the sid
+    alone. Falls back to process-local dicts when Redis is not configured.
+    """
+
+    HASH_KEY = 'ws:presence'
+    SID_KEY = 'ws:presence:sids'
+
+    def __init__(self, client: Optional[redis.Redis] = None) -> None:
+        """Initialize the store.
+
+        Args:
+            client: Redis client, or None to keep presence in memory.
+        """
+        self._redis = client
+        self._uid_to_sid: Dict[str, str] = {}
+        self._sid_to_uid: Dict[str, str] = {}
+
+    def set(self, user_id: str, sid: str) -> None:
+        """Mark a user as online with the given SocketIO session id."""
+        if self._redis is None:
+            self._uid_to_sid[user_id] = sid
+            self._sid_to_uid[sid] = user_id
+            return
+        pipe = self._redis.pipeline()
+        pipe.hset(self.HASH_KEY, user_id, sid)
+        pipe.hset(self.SID_KEY, sid, user_id)
+        pipe.setex(f'{self.HASH_KEY}:{user_id}', Config.PRESENCE_TTL_SECONDS, sid)
+        pipe.execute()
+
+    def remove_sid(self, sid: str) -> None:
+        """Forget a disconnected SocketIO session.
+
+        The user is only marked offline if this sid is still their current
+        connection, so closing an old tab does not hide a newer one.
+        """
+        if self._redis is None:
+            user_id = self._sid_to_uid.pop(sid, None)
+            if user_id is not None and self._uid_to_sid.get(user_id) == sid:
+                del self._uid_to_sid[user_id]
+            return
+        user_id = self._redis.hget(self.SID_KEY, sid)
+        pipe = self._redis.pipeline()
+        pipe.hdel(self.SID_KEY, sid)
+        if user_id is not None and self._redis.hget(self.HASH_KEY, user_id) == sid:
+            pipe.hdel(self.HASH_KEY, user_id)
+            pipe.delete(f'{self.HASH_KEY}:{user_id}')
+        pipe.execute()
+
+    def get(self, user_id: Optional[str]) -> Optional[str]:
+        """Get the SocketIO session id of an online user, or None."""
+        if not user_id:
+            return None
+        if self._redis is None:
+            return self._uid_to_sid.get(user_id)
+        return self._redis.hget(self.HASH_KEY, user_id)
+
+    def filter_online(self, user_ids: Iterable[str]) -> Set[str]:
+        """Get which of the given users are online, in one round-trip."""
+        ids = list(user_ids)
+        if not ids:
+            return set()
+        if self._redis is None:
+            return {uid for uid in ids if uid in self._uid_to_sid}
+        sids = self._redis.hmget(self.HASH_KEY, ids)
+        return {uid for uid, sid in zip(ids, sids) if sid is not None}
+
+    def __contains__(self, user_id: Optional[str]) -> bool:
+        return self.get(user_id) is not None
+
+
+# Online users tracking for chat feature
+online_users: PresenceStore = PresenceStore(redis_client)
+
+
+class TypingThrottle:
+    """Rate-limits ``is_typing=True`` indicators per (sender, receiver) pair.
+
+    A keystroke only produces a typing event if none was let through for
+    the same pair within ``Config.TYPING_THROTTLE_MS``. With Redis the
+    window is a ``typing:{sender}:{receiver}`` key set with NX/PX, shared by
+    every worker; otherwise a process-local dict of timestamps is used.
+    """
+
+    def __init__(self, client: Optional[redis.Redis] = None) -> None:
+        """Initialize the throttle.
+
+        Args:
+            client: Redis client, or None to track windows in memory.
+        """
+        self._redis = client
+        self._last: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+
+    def allow(self, sender_id: str, receiver_id: str) -> bool:
+        """Check whether a typing indicator may be emitted now."""
+        window_ms = Config.TYPING_THROTTLE_MS
+        if self._redis is not None:
+            return bool(self._redis.set(f'typing:{sender_id}:{receiver_id}',
+                                        1, nx=True, px=window_ms))
+        now = time.monotonic()
+        key = (sender_id, receiver_id)
+        with self._lock:
+            last = self._last.get(key)
+            if last is not None and (now - last) * 1000 < window_ms:
+                return False
+            self._last[key] = now
+            return True
+
+    def reset(self, sender_id: str, receiver_id: str) -> None:
+        """Close the window once the sender stops typing."""
+        if self._redis is not None:
+            self._redis.delete(f'typing:{sender_id}:{receiver_id}')
+            return
+        with self._lock:
+            self._last.pop((sender_id, receiver_id), None)
+
+
+# Debounces typing indicators sent on every keystroke
+typing_throttle: TypingThrottle = TypingThrottle(redis_client)
+
 # You can add other extensions here as needed
 # For example:
 # db = SQLAlchemy()
 # migrate = Migrate()
-# login_manager = LoginManager()
\ No newline at end of file
+# login_manager = LoginManager()
@@ -0,0 +1,17 @@
+"""Gunicorn configuration for the library management system.
+
+Usage:
+    gunicorn -c gunicorn_conf.py app:app
+"""
+worker_class = 'eventlet'
+workers = 1
+# Concurrent green-thread connections (websockets) per eventlet worker;
+# gunicorn's default of 1000 caps chat well below what one process handles
+worker_connections = 10000
+bind = '0.0.0.0:5000'
+
+
+def worker_exit(server, worker):
+    """Stop the background scheduler when a worker exits."""
+    from scheduled_tasks import shutdown_scheduler
+    shutdown_scheduler()
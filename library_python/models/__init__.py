@@ -16,11 +16,12 @@ from models.borrow import Borrow
 from models.fine import Fine        # Remove Violation alias
 from models.chat_message import ChatMessage
 from models.notification import Notification
+from models.unread_counts import UnreadCounts
 from models.database import init_db, get_db, close_db
 
 __all__ = [
     'User', 'Guest', 'Staff', 'Admin', 'get_user_by_role',
     'Book', 'Review', 'Borrow', 'Fine',
-    'ChatMessage', 'Notification',
+    'ChatMessage', 'Notification', 'UnreadCounts',
     'init_db', 'get_db', 'close_db'
 ]
\ No newline at end of file
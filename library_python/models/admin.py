@@ -2,12 +2,19 @@
 
 Inherits from Staff and adds system config capabilities.
 """
+from datetime import datetime
 from typing import Dict, Tuple
 
+from config.config import Config
+from extensions import cache
+from models.database import get_db
 from models.staff import Staff
 from models.system_config import SystemConfig
 from models.system_log import SystemLog
-from models.database import get_db  # <--- Thêm import này để tính toán fines
+
+# Flask-Caching key for the shared dashboard statistics
+_STATS_CACHE_KEY = 'admin_stats'
+
 
 class Admin(Staff):
 
@@ -36,16 +43,19 @@ class Admin(Staff):
         Returns:
             Tuple of (success, message).
         """
-        SystemConfig.update(config_data)
+        details = ", ".join(f"{k}: {v}" for k, v in config_data.items())
 
-        # Create detailed log
-        details = ", ".join([f"{k}: {v}" for k, v in config_data.items()])
-        SystemLog.add(
-            'Config Update',
-            f'Admin {self.name} updated config: {details}',
-            'admin',
-            self.id
-        )
+        # Config change and its audit log entry commit together (one fsync)
+        with get_db():
+            SystemConfig.update(config_data, commit=False)
+            SystemLog.add(
+                'Config Update',
+                f'Admin {self.name} updated config: {details}',
+                'admin',
+                self.id,
+                commit=False
+            )
+        Admin.invalidate_stats()
 
         return True, "Configuration saved successfully"
 
@@ -60,6 +70,7 @@ class Admin(Staff):
         """
         try:
             SystemLog.clear_old_logs(days)
+            Admin.invalidate_stats()
             SystemLog.add(
                 'Clear Logs',
                 f'Admin {self.name} cleared logs older than {days} days',
@@ -74,23 +85,41 @@ class Admin(Staff):
         """Get dashboard statistics for admin.
         
         Updated to be compatible with Staff Dashboard as well.
+        The figures are advisory, so they are cached for
+        Config.ADMIN_STATS_CACHE_TTL_SECONDS to absorb dashboard refreshes.
         """
-        from models.book import Book
-        from models.borrow import Borrow
-        from models.user import User
-        
-        # Calculate total debt (fines) - Logic copied from Staff model
-        db = get_db()
-        total_debt_row = db.execute(
-            'SELECT SUM(fines) as total FROM users'
-        ).fetchone()
-        total_debt = total_debt_row['total'] or 0.0
+        stats = cache.get(_STATS_CACHE_KEY)
+        if stats is not None:
+            return stats
 
-        # Get core metrics
-        active_borrows = Borrow.get_active_borrows_count()
-        overdue_count = Borrow.get_overdue_count()
-        total_users = User.get_total_users()
-        total_books = Book.get_total_count()
+        # All dashboard metrics in one round-trip; users is scanned once
+        db = get_db()
+        today = datetime.now().strftime('%Y-%m-%d')
+        row = db.execute('''
+            SELECT
+                u.total_debt,
+                u.total_users,
+                u.total_staff,
+                (SELECT total FROM book_stats WHERE id = 1) AS total_books,
+                (SELECT COALESCE(SUM(value), 0) FROM borrow_counters
+                 WHERE key IN ('borrowed', 'pending_pickup', 'waiting')
+                ) AS active_borrows,
+                (SELECT COUNT(*) FROM borrows
+                 WHERE status = 'borrowed' AND due_date < ?) AS overdue_count
+            FROM (
+                SELECT
+                    COALESCE(SUM(fines), 0.0) AS total_debt,
+                    COALESCE(SUM(role = 'user'), 0) AS total_users,
+                    COALESCE(SUM(role = 'staff'), 0) AS total_staff
+                FROM users
+            ) u
+        ''', (today,)).fetchone()
+
+        total_debt = row['total_debt']
+        active_borrows = row['active_borrows']
+        overdue_count = row['overdue_count']
+        total_users = row['total_users']
+        total_books = row['total_books']
 
         stats = {
             # --- Admin Dashboard Keys ---
@@ -98,7 +127,7 @@ class Admin(Staff):
             'total_users': total_users,
             'active_borrows': active_borrows,
             'overdue_count': overdue_count,
-            'total_staff': User.get_users_by_role('staff'),
+            'total_staff': row['total_staff'],
             'revenue': 0,  # Placeholder
 
             # --- Staff Dashboard Compatibility Keys (Aliases) ---
@@ -110,4 +139,11 @@ class Admin(Staff):
             'unread_messages': 0
         }
 
-        return stats
\ No newline at end of file
+        cache.set(_STATS_CACHE_KEY, stats,
+                  timeout=Config.ADMIN_STATS_CACHE_TTL_SECONDS)
+        return stats
+
+    @staticmethod
+    def invalidate_stats() -> None:
+        """Drop cached dashboard statistics so the next load recomputes them."""
+        cache.delete(_STATS_CACHE_KEY)
\ No newline at end of file
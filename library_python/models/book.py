@@ -3,8 +3,54 @@
 This module defines the Book model for managing library books
 in the system.
 """
-from typing import Optional, List, Dict, Any
-from models.database import get_db
+import uuid
+from operator import attrgetter
+from typing import Optional, List, Dict, Any, Iterator, Tuple
+
+from config.config import Config
+from extensions import cache
+from models.database import (chunked, forget_cached, get_db, remember_cached,
+                             request_cached)
+
+# Every Book query selects the same columns; keeping the SQL text identical
+# across calls lets sqlite3's statement cache reuse the prepared statements
+_BOOK_COLUMNS = ('id, title, author, category, publisher, year, language, isbn, '
+                 'description, cover_url, total_copies, available_copies, '
+                 'shelf_location, rating, borrow_count')
+_BOOK_SELECT = f'SELECT {_BOOK_COLUMNS} FROM books'
+
+# Stores the rounded review average; callers add the WHERE clause, and
+# restrict it with _HAS_REVIEWS so unreviewed books keep their rating
+_REFRESH_RATING_SQL = '''
+    UPDATE books
+    SET rating = (SELECT ROUND(AVG(reviews.rating), 1) FROM reviews
+                  WHERE reviews.book_id = books.id)'''
+_HAS_REVIEWS = 'EXISTS (SELECT 1 FROM reviews WHERE reviews.book_id = books.id)'
+
+# New books start fully available, unrated and never borrowed
+_INSERT_BOOK_SQL = '''
+    INSERT INTO books (id, title, author, category, publisher, year, language,
+                       isbn, description, cover_url, total_copies, available_copies,
+                       shelf_location, rating, borrow_count)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0.0, 0)'''
+
+# ORDER BY clause for each search sort key
+_SORT_SQL = {
+    'title': ' ORDER BY title ASC',
+    'author': ' ORDER BY author ASC',
+    'year': ' ORDER BY year DESC',
+    'rating': ' ORDER BY rating DESC',
+    'popular': ' ORDER BY borrow_count DESC',
+    'new': ' ORDER BY year DESC',
+}
+
+# Columns update_fields() may change; id and the derived rating and
+# borrow_count are only written by their dedicated methods
+_UPDATABLE = frozenset({
+    'title', 'author', 'category', 'publisher', 'year', 'language', 'isbn',
+    'description', 'cover_url', 'total_copies', 'available_copies',
+    'shelf_location'
+})
 
 
 class Book:
@@ -31,6 +77,19 @@ class Book:
         borrow_count (int): Total times this book has been borrowed.
     """
     
+    # Same order as _BOOK_COLUMNS, so rows can be unpacked positionally
+    __slots__ = ('id', 'title', 'author', 'category', 'publisher', 'year',
+                 'language', 'isbn', 'description', 'cover_url',
+                 'total_copies', 'available_copies', 'shelf_location',
+                 'rating', 'borrow_count')
+    # Reads every attribute in one call, in __slots__ order
+    _VALUES = attrgetter(*__slots__)
+    
+    # Columns searchable through Book.search() / the books_fts index
+    SEARCH_FIELDS = ('title', 'author', 'category')
+    # search_by value matching any of SEARCH_FIELDS
+    SEARCH_ANY = 'any'
+    
     def __init__(self, id: str, title: str, author: str, category: str,
                  publisher: str, year: int, language: str, isbn: str,
                  description: str, cover_url: str, total_copies: int,
@@ -71,7 +130,22 @@ class Book:
         self.rating = float(rating)
         self.borrow_count = int(borrow_count)
     
+    @classmethod
+    def _from_row(cls, row) -> 'Book':
+        """Build a Book from a row selected with _BOOK_COLUMNS.
+        
+        Skips the per-row dict and keyword __init__ call; the column types
+        are already enforced by the schema.
+        """
+        book = cls.__new__(cls)
+        (book.id, book.title, book.author, book.category, book.publisher,
+         book.year, book.language, book.isbn, book.description,
+         book.cover_url, book.total_copies, book.available_copies,
+         book.shelf_location, book.rating, book.borrow_count) = row
+        return book
+    
     @staticmethod
+    @request_cached('Book')
     def get_by_id(book_id: str) -> Optional['Book']:
         """Retrieve a book by its ID.
         
@@ -82,16 +156,31 @@ class Book:
             Book instance if found, None otherwise.
         """
         db = get_db()
-        row = db.execute('''
-            SELECT id, title, author, category, publisher, year, language, isbn,
-                   description, cover_url, total_copies, available_copies, 
-                   shelf_location, rating, borrow_count
-            FROM books WHERE id = ?
-        ''', (book_id,)).fetchone()
+        row = db.execute(f'{_BOOK_SELECT} WHERE id = ?', (book_id,)).fetchone()
         if row:
-            return Book(**dict(row))
+            return Book._from_row(row)
         return None
     
+    @staticmethod
+    def get_by_ids(book_ids) -> Dict[str, 'Book']:
+        """Retrieve several books with one query per 500 IDs.
+        
+        Args:
+            book_ids: Iterable of book IDs (duplicates are ignored).
+            
+        Returns:
+            Dictionary mapping book ID to Book instance for the books found.
+        """
+        db = get_db()
+        books = {}
+        for chunk in chunked(book_ids):
+            placeholders = ','.join('?' * len(chunk))
+            rows = db.execute(
+                f'{_BOOK_SELECT} WHERE id IN ({placeholders})', chunk
+            ).fetchall()
+            books.update((row['id'], Book._from_row(row)) for row in rows)
+        return books
+    
     @staticmethod
     def get_by_isbn(isbn: str) -> Optional['Book']:
         """Retrieve a book by its ISBN number.
@@ -103,14 +192,9 @@ class Book:
             Book instance if found, None otherwise.
         """
         db = get_db()
-        row = db.execute('''
-            SELECT id, title, author, category, publisher, year, language, isbn,
-                   description, cover_url, total_copies, available_copies, 
-                   shelf_location, rating, borrow_count
-            FROM books WHERE isbn = ?
-        ''', (isbn,)).fetchone()
+        row = db.execute(f'{_BOOK_SELECT} WHERE isbn = ?', (isbn,)).fetchone()
         if row:
-            return Book(**dict(row))
+            return Book._from_row(row)
         return None
     
     @staticmethod
@@ -123,28 +207,51 @@ class Book:
         Returns:
             List of Book instances.
         """
-        db = get_db()
-        query = '''SELECT id, title, author, category, publisher, year, language, isbn,
-                          description, cover_url, total_copies, available_copies, 
-                          shelf_location, rating, borrow_count
-                   FROM books'''
-        if limit:
-            query += f' LIMIT {limit}'
+        return list(Book.iter_all(limit))
+    
+    @staticmethod
+    def iter_all(limit: Optional[int] = None) -> Iterator['Book']:
+        """Yield books one at a time from the DB cursor.
+        
+        Unlike get_all(), rows are never collected into a list, so callers
+        that stop early never fetch the rest.
         
-        rows = db.execute(query).fetchall()
-        return [Book(**dict(row)) for row in rows]
+        Args:
+            limit: Maximum number of books to yield. None for all books.
+            
+        Yields:
+            Book instances.
+        """
+        db = get_db()
+        # LIMIT -1 means "no limit", keeping the statement text constant
+        rows = db.execute(f'{_BOOK_SELECT} LIMIT ?', (limit or -1,))
+        yield from map(Book._from_row, rows)
+    
+    @staticmethod
+    def _fts_phrase(columns: Tuple[str, ...], query: str) -> str:
+        """Build an FTS5 query matching query as a literal substring of any column."""
+        escaped = query.replace('"', '""')
+        return f'{{{" ".join(columns)}}} : "{escaped}"'
     
     @staticmethod
     def search(query: str = '', search_by: str = 'title',
-               sort_by: str = 'title', category: str = '') -> List['Book']:
+               sort_by: str = 'title', category: str = '',
+               exact: bool = False) -> List['Book']:
         """Search for books with various filters and sorting options.
         
+        The matching IDs are cached for a short while (see _search_ids);
+        the books themselves are always read fresh, so copy counts are
+        current even on a cache hit.
+        
         Args:
             query: Search query string.
-            search_by: Field to search in ('title', 'author', 'category').
+            search_by: Field to search in ('title', 'author', 'category',
+                or Book.SEARCH_ANY for all three).
             sort_by: Sorting criteria ('title', 'author', 'year', 'rating',
                     'popular', 'new').
             category: Filter by specific category.
+            exact: Match the whole field (case-insensitive) instead of a
+                substring; served by the field's NOCASE index.
             
         Returns:
             List of matching Book instances.
@@ -153,47 +260,96 @@ class Book:
             >>> books = Book.search(query='python', search_by='title', 
             ...                     sort_by='rating')
         """
-        db = get_db()
+        query = Book._normalize_query(query, exact)
+        if sort_by not in _SORT_SQL:
+            sort_by = ''  # Unknown keys sort alike; keeps cache keys bounded
+        book_ids = Book._search_ids(query, search_by, sort_by, category, exact)
+        books = Book.get_by_ids(book_ids)
+        return [books[book_id] for book_id in book_ids if book_id in books]
+    
+    @staticmethod
+    def search_any(query: str = '', sort_by: str = 'title',
+                   category: str = '') -> List['Book']:
+        """Search title, author and category at once.
+        
+        Runs as a single query: one full-text lookup across the three
+        indexed columns, or one LIKE scan for queries under three characters.
         
-        sql = '''SELECT id, title, author, category, publisher, year, language, isbn,
-                        description, cover_url, total_copies, available_copies, 
-                        shelf_location, rating, borrow_count
-                 FROM books WHERE 1=1'''
+        Args:
+            query: Search query string.
+            sort_by: Sorting criteria, as for search().
+            category: Filter by specific category.
+            
+        Returns:
+            List of Book instances matching in any of the fields.
+        """
+        return Book.search(query, Book.SEARCH_ANY, sort_by, category)
+    
+    @staticmethod
+    @cache.memoize(timeout=Config.SEARCH_CACHE_TTL_SECONDS)
+    def _search_ids(query: str, search_by: str, sort_by: str,
+                    category: str, exact: bool) -> List[str]:
+        """Get the IDs of the books matching a search, in result order.
+        
+        Memoized per argument tuple; invalidate_cached_lists() drops every
+        entry when the catalog changes.
+        """
+        where, params = Book._search_clauses(query, search_by, sort_by,
+                                             category, exact)
+        rows = get_db().execute(f'SELECT id FROM books {where}', params)
+        return [row[0] for row in rows]
+    
+    @staticmethod
+    def _normalize_query(query: str, exact: bool) -> str:
+        """Trim a search query, and lowercase it unless matching exactly.
+        
+        Substring matching is case-insensitive on both the full-text and
+        LIKE paths, so lowercasing lets case variants share a cache entry.
+        """
+        query = (query or '').strip()
+        return query if exact else query.lower()
+    
+    @staticmethod
+    def _search_clauses(query: str, search_by: str, sort_by: str,
+                        category: str, exact: bool) -> Tuple[str, List[Any]]:
+        """Build the WHERE/ORDER BY part of a search and its parameters."""
+        sql = 'WHERE 1=1'
         params = []
         
-        # Apply search filters
-        if query:
-            if search_by == 'title':
-                sql += ' AND LOWER(title) LIKE ?'
-                params.append(f'%{query.lower()}%')
-            elif search_by == 'author':
-                sql += ' AND LOWER(author) LIKE ?'
-                params.append(f'%{query.lower()}%')
-            elif search_by == 'category':
-                sql += ' AND LOWER(category) LIKE ?'
-                params.append(f'%{query.lower()}%')
+        # Apply search filters (full-text index; queries shorter than a
+        # trigram cannot use it and fall back to a LIKE scan)
+        if search_by == Book.SEARCH_ANY:
+            columns = Book.SEARCH_FIELDS
+        elif search_by in Book.SEARCH_FIELDS:
+            columns = (search_by,)
+        else:
+            columns = ()
+        if query and columns:
+            if exact:
+                sql += ' AND (' + ' OR '.join(
+                    f'{column} = ? COLLATE NOCASE' for column in columns) + ')'
+                params.extend([query] * len(columns))
+            elif len(query) >= 3:
+                sql += (' AND rowid IN (SELECT rowid FROM books_fts '
+                        'WHERE books_fts MATCH ?)')
+                params.append(Book._fts_phrase(columns, query))
+            else:
+                # Escape LIKE wildcards so both paths match literal substrings
+                escaped = (query.replace('\\', '\\\\')
+                           .replace('%', '\\%').replace('_', '\\_'))
+                sql += ' AND (' + ' OR '.join(
+                    f"LOWER({column}) LIKE ? ESCAPE '\\'" for column in columns) + ')'
+                params.extend([f'%{escaped}%'] * len(columns))
         
         # Apply category filter
         if category:
             sql += ' AND category = ?'
             params.append(category)
         
-        # Apply sorting
-        if sort_by == 'title':
-            sql += ' ORDER BY title ASC'
-        elif sort_by == 'author':
-            sql += ' ORDER BY author ASC'
-        elif sort_by == 'year':
-            sql += ' ORDER BY year DESC'
-        elif sort_by == 'rating':
-            sql += ' ORDER BY rating DESC'
-        elif sort_by == 'popular':
-            sql += ' ORDER BY borrow_count DESC'
-        elif sort_by == 'new':
-            sql += ' ORDER BY year DESC'
-        
-        rows = db.execute(sql, params).fetchall()
-        return [Book(**dict(row)) for row in rows]
+        # Apply sorting (unknown keys leave the database order)
+        sql += _SORT_SQL.get(sort_by, '')
+        
+        return sql, params
     
     @staticmethod
     def get_by_category(category: str, limit: Optional[int] = None) -> List['Book']:
@@ -207,15 +363,11 @@ class Book:
             List of Book instances in the specified category.
         """
         db = get_db()
-        query = '''SELECT id, title, author, category, publisher, year, language, isbn,
-                          description, cover_url, total_copies, available_copies, 
-                          shelf_location, rating, borrow_count
-                   FROM books WHERE category = ?'''
-        if limit:
-            query += f' LIMIT {limit}'
-        
-        rows = db.execute(query, (category,)).fetchall()
-        return [Book(**dict(row)) for row in rows]
+        # LIMIT -1 means "no limit", keeping the statement text constant
+        rows = db.execute(
+            f'{_BOOK_SELECT} WHERE category = ? LIMIT ?', (category, limit or -1)
+        ).fetchall()
+        return list(map(Book._from_row, rows))
     
     @staticmethod
     def get_new_arrivals(limit: int = 10) -> List['Book']:
@@ -228,13 +380,10 @@ class Book:
             List of newest Book instances.
         """
         db = get_db()
-        rows = db.execute('''
-            SELECT id, title, author, category, publisher, year, language, isbn,
-                   description, cover_url, total_copies, available_copies, 
-                   shelf_location, rating, borrow_count
-            FROM books ORDER BY year DESC LIMIT ?
-        ''', (limit,)).fetchall()
-        return [Book(**dict(row)) for row in rows]
+        rows = db.execute(
+            f'{_BOOK_SELECT} ORDER BY year DESC LIMIT ?', (limit,)
+        ).fetchall()
+        return list(map(Book._from_row, rows))
     
     @staticmethod
     def get_most_borrowed(limit: int = 10) -> List['Book']:
@@ -247,13 +396,10 @@ class Book:
             List of most borrowed Book instances.
         """
         db = get_db()
-        rows = db.execute('''
-            SELECT id, title, author, category, publisher, year, language, isbn,
-                   description, cover_url, total_copies, available_copies, 
-                   shelf_location, rating, borrow_count
-            FROM books ORDER BY borrow_count DESC LIMIT ?
-        ''', (limit,)).fetchall()
-        return [Book(**dict(row)) for row in rows]
+        rows = db.execute(
+            f'{_BOOK_SELECT} ORDER BY borrow_count DESC LIMIT ?', (limit,)
+        ).fetchall()
+        return list(map(Book._from_row, rows))
     
     @staticmethod
     def get_top_rated(limit: int = 10) -> List['Book']:
@@ -266,17 +412,16 @@ class Book:
             List of top-rated Book instances.
         """
         db = get_db()
-        rows = db.execute('''
-            SELECT id, title, author, category, publisher, year, language, isbn,
-                   description, cover_url, total_copies, available_copies, 
-                   shelf_location, rating, borrow_count
-            FROM books ORDER BY rating DESC LIMIT ?
-        ''', (limit,)).fetchall()
-        return [Book(**dict(row)) for row in rows]
+        rows = db.execute(
+            f'{_BOOK_SELECT} ORDER BY rating DESC LIMIT ?', (limit,)
+        ).fetchall()
+        return list(map(Book._from_row, rows))
     
     @staticmethod
+    @cache.cached(timeout=Config.CATEGORIES_CACHE_TTL_SECONDS,
+                  key_prefix='book_categories')
     def get_all_categories() -> List[str]:
-        """Retrieve all unique book categories.
+        """Retrieve all unique book categories (cached).
         
         Returns:
             Sorted list of category names.
@@ -285,7 +430,13 @@ class Book:
         rows = db.execute(
             'SELECT DISTINCT category FROM books ORDER BY category'
         ).fetchall()
-        return [row['category'] for row in rows]
+        return [row[0] for row in rows]
+    
+    @staticmethod
+    def invalidate_cached_lists() -> None:
+        """Drop cached home lists, categories and searches after catalog edits."""
+        cache.delete_many('home_books', 'book_categories')
+        cache.delete_memoized(Book._search_ids)
     
     def update_available_copies(self, change: int) -> None:
         """Update the available copies count.
@@ -312,6 +463,81 @@ class Book:
         )
         db.commit()
     
+    def record_borrow(self, commit: bool = True) -> bool:
+        """Take one copy off the shelf and count the borrow, atomically.
+        
+        A single conditional UPDATE does the availability check, the
+        decrement and the borrow count, so two concurrent borrows cannot
+        both take the last copy.
+        
+        Args:
+            commit: Commit immediately; pass False to let the caller
+                commit this together with other writes.
+            
+        Returns:
+            True if a copy was available and has been taken.
+        """
+        db = get_db()
+        cursor = db.execute('''
+            UPDATE books
+            SET available_copies = available_copies - 1,
+                borrow_count = borrow_count + 1
+            WHERE id = ? AND available_copies > 0
+        ''', (self.id,))
+        if cursor.rowcount != 1:
+            return False
+        if commit:
+            db.commit()
+        
+        self.available_copies -= 1
+        self.borrow_count += 1
+        remember_cached('Book', self.id, self)
+        return True
+    
+    def record_return(self, commit: bool = True) -> None:
+        """Put one copy back on the shelf (never above total_copies).
+        
+        Args:
+            commit: Commit immediately; pass False to let the caller
+                commit this together with other writes.
+        """
+        db = get_db()
+        db.execute('''
+            UPDATE books
+            SET available_copies = MIN(total_copies, available_copies + 1)
+            WHERE id = ?
+        ''', (self.id,))
+        if commit:
+            db.commit()
+        
+        self.available_copies = min(self.total_copies, self.available_copies + 1)
+        remember_cached('Book', self.id, self)
+    
+    @staticmethod
+    def bulk_update_available(changes: List[Tuple[int, str]],
+                              commit: bool = True) -> None:
+        """Apply available copy changes to many books in one statement batch.
+        
+        Counts are clamped to 0..total_copies like update_available_copies().
+        
+        Args:
+            changes: List of (change, book_id) pairs.
+            commit: Commit immediately; pass False to let the caller
+                commit this together with other writes.
+        """
+        if not changes:
+            return
+        db = get_db()
+        db.executemany('''
+            UPDATE books
+            SET available_copies = MAX(0, MIN(total_copies, available_copies + ?))
+            WHERE id = ?
+        ''', changes)
+        if commit:
+            db.commit()
+        for _, book_id in changes:
+            forget_cached('Book', book_id)
+    
     def increment_borrow_count(self) -> None:
         """Increment the borrow count by 1.
         
@@ -328,21 +554,41 @@ class Book:
     def update_rating(self) -> None:
         """Recalculate and update average rating from all reviews.
         
-        Fetches all reviews for this book and updates the rating field.
+        The average is computed and stored by a single UPDATE; books
+        without reviews keep their current rating.
         """
         db = get_db()
-        row = db.execute(
-            'SELECT AVG(rating) as avg_rating FROM reviews WHERE book_id = ?',
-            (self.id,)
-        ).fetchone()
+        rows = db.execute(f'''
+            {_REFRESH_RATING_SQL} WHERE id = ? AND {_HAS_REVIEWS}
+            RETURNING rating
+        ''', (self.id,)).fetchall()
+        db.commit()
         
-        if row and row['avg_rating']:
-            self.rating = round(float(row['avg_rating']), 1)
+        if rows:
+            # RETURNING skips REAL affinity, so whole averages come back as int
+            self.rating = float(rows[0]['rating'])
+    
+    @staticmethod
+    def bulk_refresh_ratings(book_ids) -> None:
+        """Recalculate the average rating of many books.
+        
+        Runs one UPDATE per 500 IDs instead of one query pair per book.
+        
+        Args:
+            book_ids: Iterable of book IDs (duplicates are ignored).
+        """
+        db = get_db()
+        refreshed = []
+        for chunk in chunked(book_ids):
+            placeholders = ','.join('?' * len(chunk))
             db.execute(
-                'UPDATE books SET rating = ? WHERE id = ?',
-                (self.rating, self.id)
+                f'{_REFRESH_RATING_SQL} WHERE id IN ({placeholders}) AND {_HAS_REVIEWS}',
+                chunk
             )
-            db.commit()
+            refreshed.extend(chunk)
+        db.commit()
+        for book_id in refreshed:
+            forget_cached('Book', book_id)
     
     @staticmethod
     def create(title: str, author: str, category: str, publisher: str,
@@ -366,20 +612,18 @@ class Book:
         Returns:
             New Book instance if successful, None otherwise.
         """
-        import uuid
         db = get_db()
         
         book_id = str(uuid.uuid4())
         
         try:
-            db.execute('''
-                INSERT INTO books (id, title, author, category, publisher, year, language,
-                                 isbn, description, cover_url, total_copies, available_copies,
-                                 shelf_location, rating, borrow_count)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0.0, 0)
-            ''', (book_id, title, author, category, publisher, year, language, isbn,
-                  description, cover_url, total_copies, total_copies, shelf_location))
+            db.execute(_INSERT_BOOK_SQL, (
+                book_id, title, author, category, publisher, year, language,
+                isbn, description, cover_url, total_copies, total_copies,
+                shelf_location
+            ))
             db.commit()
+            Book.invalidate_cached_lists()
             
             return Book.get_by_id(book_id)
         except Exception as e:
@@ -394,6 +638,8 @@ class Book:
         db = get_db()
         db.execute('DELETE FROM books WHERE id = ?', (self.id,))
         db.commit()
+        forget_cached('Book', self.id)
+        Book.invalidate_cached_lists()
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert book to dictionary representation.
@@ -401,23 +647,15 @@ class Book:
         Returns:
             Dictionary containing all book attributes.
         """
-        return {
-            'id': self.id,
-            'title': self.title,
-            'author': self.author,
-            'category': self.category,
-            'publisher': self.publisher,
-            'year': self.year,
-            'language': self.language,
-            'isbn': self.isbn,
-            'description': self.description,
-            'cover_url': self.cover_url,
-            'total_copies': self.total_copies,
-            'available_copies': self.available_copies,
-            'shelf_location': self.shelf_location,
-            'rating': self.rating,
-            'borrow_count': self.borrow_count
-        }
+        return dict(zip(Book.__slots__, self.to_tuple()))
+    
+    def to_tuple(self) -> Tuple[Any, ...]:
+        """Get the book's attributes as a tuple, in Book.__slots__ order.
+        
+        Returns:
+            Tuple of all book attributes.
+        """
+        return Book._VALUES(self)
     
     # ==================== SERVICE METHODS (Merged from BookService) ====================
     
@@ -425,43 +663,42 @@ class Book:
     def get_total_count() -> int:
         """Get total number of books in catalog.
         
+        Reads the trigger-maintained book_stats row instead of counting.
+        
         Returns:
             Total book count.
         """
         db = get_db()
-        row = db.execute('SELECT COUNT(*) as count FROM books').fetchone()
-        return row['count']
+        row = db.execute('SELECT total FROM book_stats WHERE id = 1').fetchone()
+        return row[0]
     
     def update_fields(self, **kwargs) -> tuple:
         """Update book information.
         
         Args:
-            **kwargs: Fields to update (title, author, etc.).
+            **kwargs: Fields to update (title, author, etc.). Names outside
+                the updatable columns are ignored.
             
         Returns:
             Tuple of (success: bool, message: str).
         """
-        db = get_db()
-        
-        # Build update query dynamically
-        fields = []
-        values = []
-        
-        for key, value in kwargs.items():
-            if hasattr(self, key):
-                fields.append(f"{key} = ?")
-                values.append(value)
-                setattr(self, key, value)
-        
-        if not fields:
+        items = [(key, value) for key, value in kwargs.items()
+                 if key in _UPDATABLE]
+        if not items:
             return False, "No fields to update"
         
+        fields = ', '.join(f'{key} = ?' for key, _ in items)
+        values = [value for _, value in items]
         values.append(self.id)
-        query = f"UPDATE books SET {', '.join(fields)} WHERE id = ?"
         
         try:
-            db.execute(query, values)
+            db = get_db()
+            db.execute(f'UPDATE books SET {fields} WHERE id = ?', values)
             db.commit()
+            for key, value in items:
+                setattr(self, key, value)
+            forget_cached('Book', self.id)
+            Book.invalidate_cached_lists()
             return True, "Book updated successfully"
         except Exception as e:
             return False, f"Failed to update book: {e}"
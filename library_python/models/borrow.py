@@ -1,27 +1,169 @@
 """Borrow model with improved fine calculation and business rules.
 
 Refactored for cleaner logic and property access.
+
+Indexes the queries rely on (created in init_db()):
+    idx_borrows_user_status_date: get_user_borrows, get_active_borrows,
+        get_user_borrowed_books
+    idx_borrows_user_status_due: get_overdue_borrows(user_id), get_upcoming_due
+    idx_borrows_status_due: get_overdue_borrows(), get_overdue_count,
+        get_all_pending, get_user_borrows_by_status
+    idx_borrows_user_book_status: get_by_user_and_book
+    idx_borrows_pending_until: auto_cancel_expired_pickups
 """
+import os
+import time
+import uuid
+from collections import Counter
 from datetime import datetime, timedelta
-from typing import Optional, Tuple
+from typing import Any, List, Optional, Tuple
 
 from config.config import Config
 from models.book import Book
 from models.database import get_db
 
+# Borrow columns in __init__ order, so rows can be passed positionally
+_BORROW_COLUMNS = ('id', 'user_id', 'book_id', 'borrow_date', 'due_date',
+                   'return_date', 'status', 'renewed_count', 'pending_until',
+                   'condition', 'damage_fee', 'late_fee')
+# Each borrow row followed by its book's columns, so list queries hydrate
+# the book too; LEFT JOIN keeps borrows whose book has been deleted
+_BORROW_SELECT = (
+    'SELECT ' + ', '.join(f'b.{column}' for column in _BORROW_COLUMNS) + ', '
+    + ', '.join(f'bk.{column}' for column in Book.__slots__)
+    + ' FROM borrows b LEFT JOIN books bk ON bk.id = b.book_id'
+)
+# Index of the first book column in a _BORROW_SELECT row
+_BOOK_OFFSET = len(_BORROW_COLUMNS)
+# Appended to INSERT/UPDATE so the written row comes back without a re-SELECT
+_RETURNING = ' RETURNING ' + ', '.join(_BORROW_COLUMNS)
+
+# Statements built once at import: sqlite3 keys its per-connection statement
+# cache by the SQL string, and constants skip re-formatting it on each call
+_BY_ID_SQL = f'{_BORROW_SELECT} WHERE b.id = ?'
+_USER_BORROWS_SQL = (f'{_BORROW_SELECT} WHERE b.user_id = ? '
+                     'ORDER BY b.borrow_date DESC')
+_USER_BORROWS_BY_STATUS_SQL = (f'{_BORROW_SELECT} WHERE b.user_id = ? AND b.status = ? '
+                               'ORDER BY b.borrow_date DESC')
+_USER_BOOK_LATEST_SQL = (f'{_BORROW_SELECT} WHERE b.user_id = ? AND b.book_id = ? AND b.status = ? '
+                         'ORDER BY b.borrow_date DESC LIMIT 1')
+_ACTIVE_BORROWS_SQL = (f"{_BORROW_SELECT} WHERE b.user_id = ? AND b.status IN ('borrowed', 'pending_pickup') "
+                       'ORDER BY b.borrow_date DESC')
+# Borrowed first, then pending pickups ('borrowed' < 'pending_pickup')
+_BORROWED_AND_PENDING_SQL = (f"{_BORROW_SELECT} WHERE b.user_id = ? AND b.status IN ('borrowed', 'pending_pickup') "
+                             'ORDER BY b.status, b.borrow_date DESC')
+_OVERDUE_SQL = (f"{_BORROW_SELECT} WHERE b.status = 'borrowed' AND b.due_date < ? "
+                'ORDER BY b.due_date ASC')
+_USER_OVERDUE_SQL = (f"{_BORROW_SELECT} WHERE b.user_id = ? AND b.status = 'borrowed' AND b.due_date < ? "
+                     'ORDER BY b.due_date ASC')
+_UPCOMING_DUE_SQL = (f"{_BORROW_SELECT} WHERE b.user_id = ? AND b.status = 'borrowed' AND b.due_date BETWEEN ? AND ? "
+                     'ORDER BY b.due_date ASC')
+_PENDING_SQL = f"{_BORROW_SELECT} WHERE b.status = 'pending_pickup' ORDER BY b.borrow_date ASC"
+_BY_STATUS_SQL = f'{_BORROW_SELECT} WHERE b.status = ? ORDER BY b.borrow_date DESC'
+_ALL_SQL = f'{_BORROW_SELECT} ORDER BY b.borrow_date DESC'
+
+_INSERT_BORROW_SQL = '''
+    INSERT INTO borrows (id, user_id, book_id, borrow_date, due_date, 
+                       return_date, status, renewed_count, pending_until,
+                       condition, damage_fee, late_fee)
+    VALUES (?, ?, ?, ?, ?, NULL, 'pending_pickup', 0, ?, NULL, 0, 0)
+''' + _RETURNING
+# Status transitions, each guarded on the status it moves away from
+_APPROVE_PICKUP_SQL = '''
+    UPDATE borrows
+    SET status = 'borrowed', due_date = ?
+    WHERE id = ? AND status = 'pending_pickup'
+''' + _RETURNING
+_RETURN_SQL = '''
+    UPDATE borrows
+    SET status = 'returned', return_date = ?, condition = ?,
+        late_fee = ?, damage_fee = ?
+    WHERE id = ? AND status = 'borrowed'
+''' + _RETURNING
+_RENEW_SQL = '''
+    UPDATE borrows SET due_date = ?, renewed_count = renewed_count + 1
+    WHERE id = ? AND status = 'borrowed' AND renewed_count = ?
+''' + _RETURNING
+_CANCEL_SQL = (
+    "UPDATE borrows SET status = 'cancelled' "
+    "WHERE id = ? AND status = 'pending_pickup'" + _RETURNING
+)
+
+# Billing units for late fees
+_HOUR = timedelta(hours=1)
+_DAY = timedelta(days=1)
+
+# Return condition -> (share of book value, flat fee) charged as damage fee;
+# unknown conditions are charged nothing
+_DAMAGE_TABLE = {
+    'good': (0.0, 0.0),
+    'minor_damage': (0.20, 0.0),
+    'major_damage': (1.0, 15000.0),
+    'lost': (1.0, 20000.0),
+}
+_NO_DAMAGE = (0.0, 0.0)
+
+
+
+# (epoch second, 'YYYY-MM-DD HH:MM:SS') of the last _now_str() call
+_now_str_cache: Tuple[int, str] = (0, '')
+
+
+def _new_borrow_id() -> str:
+    """Generate a time-ordered borrow ID in the UUIDv7 layout (RFC 9562).
+
+    The first 48 bits are the Unix time in milliseconds and the rest is
+    random, so new borrows append to the right of the primary key index
+    instead of landing at random pages like uuid4. The string form is
+    an ordinary UUID, compatible with existing IDs.
+    """
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10), 'big')
+    value = value & ~(0xF << 76) | 0x7 << 76  # version 7
+    value = value & ~(0x3 << 62) | 0x2 << 62  # RFC 4122 variant
+    return str(uuid.UUID(int=value))
+
+
+def _format_datetime(value: datetime) -> str:
+    """Format a timestamp the way borrows store it ('YYYY-MM-DD HH:MM:SS').
+
+    isoformat is implemented in C and faster than the equivalent strftime.
+    """
+    return value.isoformat(sep=' ', timespec='seconds')
+
+
+def _now_str() -> str:
+    """Current local time as stored in borrows, formatted once per second."""
+    global _now_str_cache
+    second = int(time.time())
+    cached_second, value = _now_str_cache
+    if cached_second != second:
+        value = datetime.fromtimestamp(second).isoformat(sep=' ')
+        _now_str_cache = (second, value)
+    return value
+
+
+def _today_str() -> str:
+    """Current local date ('YYYY-MM-DD'), for comparisons against due_date."""
+    return _now_str()[:10]
+
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    """Parse a stored 'YYYY-MM-DD HH:MM:SS' or 'YYYY-MM-DD' timestamp.
+
+    Uses datetime.fromisoformat (implemented in C), which accepts both
+    formats and is much faster than strptime.
+    """
+    return datetime.fromisoformat(value) if value else None
+
+
 class Borrow:
-    @staticmethod
-    def get_expired_pickups_details(hours=48):
-        """Lấy danh sách chi tiết các đơn pending quá hạn để gửi thông báo."""
-        from datetime import datetime, timedelta
-        db = get_db()
-        limit_time = (datetime.now() - timedelta(hours=hours)).strftime('%Y-%m-%d %H:%M:%S')
-        return db.execute('''
-            SELECT b.user_id, bk.title 
-            FROM borrows b
-            JOIN books bk ON b.book_id = bk.id
-            WHERE b.status = 'pending_pickup' AND b.borrow_date <= ?
-        ''', (limit_time,)).fetchall()
+    # Column attributes (due_date is a property over _due_date/_due_dt)
+    # plus the relations filled by preload_related(); no per-object __dict__
+    __slots__ = ('id', 'user_id', 'book_id', 'borrow_date', '_due_date',
+                 '_due_dt', 'return_date', 'status', 'renewed_count',
+                 'pending_until', 'condition', 'damage_fee', 'late_fee',
+                 '_book', '_user')
+
     def __init__(self, id, user_id, book_id, borrow_date, due_date, return_date,
                  status, renewed_count, pending_until=None, condition=None, 
                  damage_fee=0.0, late_fee=0.0):
@@ -37,6 +179,49 @@ class Borrow:
         self.condition = condition
         self.damage_fee = float(damage_fee) if damage_fee else 0.0
         self.late_fee = float(late_fee) if late_fee else 0.0
+        # Filled by Borrow.preload_related() to avoid per-row lookups
+        self._book = None
+        self._user = None
+    
+    @property
+    def due_date(self) -> str:
+        """Due date as stored ('YYYY-MM-DD HH:MM:SS')."""
+        return self._due_date
+    
+    @due_date.setter
+    def due_date(self, value: str) -> None:
+        # Parse once here so overdue checks never re-parse the string
+        self._due_date = value
+        self._due_dt = _parse_datetime(value)
+    
+    @classmethod
+    def _from_row(cls, row) -> 'Borrow':
+        """Build a Borrow, and its book, from a row selected with _BORROW_SELECT.
+
+        Assigns the slots positionally instead of going through __init__;
+        the column types are already enforced by the schema, only NULL
+        counters and fees need defaulting.
+        """
+        borrow = cls.__new__(cls)
+        (borrow.id, borrow.user_id, borrow.book_id, borrow.borrow_date,
+         due_date, borrow.return_date, borrow.status, renewed_count,
+         borrow.pending_until, borrow.condition, damage_fee,
+         late_fee) = row[:_BOOK_OFFSET]
+        borrow._due_date = due_date
+        borrow._due_dt = _parse_datetime(due_date)
+        borrow.renewed_count = renewed_count or 0
+        borrow.damage_fee = damage_fee or 0.0
+        borrow.late_fee = late_fee or 0.0
+        borrow._book = (Book._from_row(row[_BOOK_OFFSET:])
+                        if row[_BOOK_OFFSET] is not None else None)
+        borrow._user = None
+        return borrow
+
+    def _refresh(self, row) -> None:
+        """Reload this borrow's columns from a RETURNING row, keeping related objects."""
+        book, user = self._book, self._user
+        self.__init__(*row)
+        self._book, self._user = book, user
         
     # ---------- Convenience properties for templates ----------
     @property
@@ -64,62 +249,41 @@ class Borrow:
   
     @staticmethod
     def calculate_late_fee(due_date: datetime, return_date: datetime) -> float:
-        """Calculate late fee with grace period and tiered rates."""
+        """Calculate late fee with grace period and tiered rates.
+
+        Works on exact timedelta arithmetic: each bracket is rounded up
+        with integer ceiling division instead of float division.
+        """
         # No fee if returned on time
         if return_date <= due_date:
             return 0.0
         
-        # Calculate delay
-        delay_timedelta = return_date - due_date
-        total_minutes = delay_timedelta.total_seconds() / 60
-        
-        # Grace period settings
-        grace_minutes = Config.GRACE_PERIOD_MINUTES
-        hourly_rate = Config.LATE_FEE_HOURLY
-        daily_rate = Config.LATE_FEE_DAILY
-        
-        # Within grace period -> No charge
-        if total_minutes <= grace_minutes:
+        # Effective delay after the grace period; none means no charge
+        effective = (return_date - due_date
+                     - timedelta(minutes=Config.GRACE_PERIOD_MINUTES))
+        if effective <= timedelta(0):
             return 0.0
         
-        # Calculate effective delay after grace period
-        effective_minutes = total_minutes - grace_minutes
-        effective_hours = effective_minutes / 60
-        effective_days = effective_hours / 24
-        
-        # Short-term delay: < 24 hours -> Charge by hour
-        if effective_hours < 24:
-            # Round up to next hour
-            hours_to_charge = int(effective_hours) + (1 if effective_hours % 1 > 0 else 0)
-            return hours_to_charge * hourly_rate
+        # Short-term delay: < 24 hours -> Charge by hour (rounded up)
+        if effective < _DAY:
+            return -(-effective // _HOUR) * Config.LATE_FEE_HOURLY
         
-        # Long-term delay: >= 24 hours -> Charge by day
-        else:
-            # Round up to next day
-            days_to_charge = int(effective_days) + (1 if effective_days % 1 > 0 else 0)
-            return days_to_charge * daily_rate
+        # Long-term delay: >= 24 hours -> Charge by day (rounded up)
+        return -(-effective // _DAY) * Config.LATE_FEE_DAILY
     
     @staticmethod
     def calculate_damage_fee(condition: str, book_value: float) -> float:
-        """Calculate damage or loss fee based on condition."""
-        if condition == 'good':
-            return 0.0
-        elif condition == 'minor_damage':
-            return book_value * 0.20
-        elif condition == 'major_damage':
-            return book_value + 15000.0
-        elif condition == 'lost':
-            return book_value + 20000.0
-        else:
-            return 0.0
+        """Calculate damage or loss fee based on condition (see _DAMAGE_TABLE)."""
+        multiplier, flat_fee = _DAMAGE_TABLE.get(condition, _NO_DAMAGE)
+        return book_value * multiplier + flat_fee
 
     @staticmethod
     def get_by_id(borrow_id):
         """Get borrow by ID"""
         db = get_db()
-        row = db.execute('SELECT * FROM borrows WHERE id = ?', (borrow_id,)).fetchone()
+        row = db.execute(_BY_ID_SQL, (borrow_id,)).fetchone()
         if row:
-            return Borrow(**dict(row))
+            return Borrow._from_row(row)
         return None
     
     @staticmethod
@@ -128,89 +292,91 @@ class Borrow:
         db = get_db()
         
         if status:
-            rows = db.execute(
-                'SELECT * FROM borrows WHERE user_id = ? AND status = ? ORDER BY borrow_date DESC',
-                (user_id, status)
-            ).fetchall()
+            rows = db.execute(_USER_BORROWS_BY_STATUS_SQL,
+                              (user_id, status)).fetchall()
         else:
-            rows = db.execute(
-                'SELECT * FROM borrows WHERE user_id = ? ORDER BY borrow_date DESC',
-                (user_id,)
-            ).fetchall()
+            rows = db.execute(_USER_BORROWS_SQL, (user_id,)).fetchall()
         
-        return [Borrow(**dict(row)) for row in rows]
+        return list(map(Borrow._from_row, rows))
+    
+    @staticmethod
+    def get_by_user_and_book(user_id, book_id, status):
+        """Get a user's most recent borrow of a book with the given status."""
+        db = get_db()
+        row = db.execute(_USER_BOOK_LATEST_SQL,
+                         (user_id, book_id, status)).fetchone()
+        return Borrow._from_row(row) if row else None
     
     @staticmethod
     def get_active_borrows(user_id):
         """Get active borrows (pending_pickup or borrowed)."""
         db = get_db()
-        rows = db.execute(
-            "SELECT * FROM borrows WHERE user_id = ? AND status IN ('borrowed', 'pending_pickup') ORDER BY borrow_date DESC",
-            (user_id,)
-        ).fetchall()
-        return [Borrow(**dict(row)) for row in rows]
+        rows = db.execute(_ACTIVE_BORROWS_SQL, (user_id,)).fetchall()
+        return list(map(Borrow._from_row, rows))
     
     @staticmethod
     def get_overdue_borrows(user_id=None):
         """Get overdue borrows"""
         db = get_db()
-        today = datetime.now().strftime('%Y-%m-%d')
+        today = _today_str()
         
         if user_id:
-            rows = db.execute(
-                "SELECT * FROM borrows WHERE user_id = ? AND status = 'borrowed' AND due_date < ? ORDER BY due_date ASC",
-                (user_id, today)
-            ).fetchall()
+            rows = db.execute(_USER_OVERDUE_SQL, (user_id, today)).fetchall()
         else:
-            rows = db.execute(
-                "SELECT * FROM borrows WHERE status = 'borrowed' AND due_date < ? ORDER BY due_date ASC",
-                (today,)
-            ).fetchall()
+            rows = db.execute(_OVERDUE_SQL, (today,)).fetchall()
         
-        return [Borrow(**dict(row)) for row in rows]
+        return list(map(Borrow._from_row, rows))
     
     @staticmethod
     def get_upcoming_due(user_id, days=3):
         """Get borrows due within specified days"""
         db = get_db()
-        today = datetime.now()
-        future_date = (today + timedelta(days=days)).strftime('%Y-%m-%d')
-        today_str = today.strftime('%Y-%m-%d')
+        today_str = _today_str()
+        future_date = (datetime.fromisoformat(today_str)
+                       + timedelta(days=days)).date().isoformat()
         
-        rows = db.execute(
-            "SELECT * FROM borrows WHERE user_id = ? AND status = 'borrowed' AND due_date BETWEEN ? AND ? ORDER BY due_date ASC",
-            (user_id, today_str, future_date)
-        ).fetchall()
+        rows = db.execute(_UPCOMING_DUE_SQL,
+                          (user_id, today_str, future_date)).fetchall()
         
-        return [Borrow(**dict(row)) for row in rows]
+        return list(map(Borrow._from_row, rows))
     
     @staticmethod
     def get_all_pending():
         """Get all pending borrow requests (pending_pickup status)."""
         db = get_db()
-        rows = db.execute(
-            "SELECT * FROM borrows WHERE status = 'pending_pickup' ORDER BY borrow_date ASC"
-        ).fetchall()
-        return [Borrow(**dict(row)) for row in rows]
+        rows = db.execute(_PENDING_SQL).fetchall()
+        return list(map(Borrow._from_row, rows))
     
     @staticmethod
     def get_user_borrows_by_status(status):
         """Get all borrows with a specific status."""
         db = get_db()
-        rows = db.execute(
-            "SELECT * FROM borrows WHERE status = ? ORDER BY borrow_date DESC",
-            (status,)
-        ).fetchall()
-        return [Borrow(**dict(row)) for row in rows]
+        rows = db.execute(_BY_STATUS_SQL, (status,)).fetchall()
+        return list(map(Borrow._from_row, rows))
     
     @staticmethod
     def get_all():
         """Get all borrows"""
         db = get_db()
-        rows = db.execute(
-            "SELECT * FROM borrows ORDER BY borrow_date DESC"
-        ).fetchall()
-        return [Borrow(**dict(row)) for row in rows]
+        rows = db.execute(_ALL_SQL).fetchall()
+        return list(map(Borrow._from_row, rows))
+
+    @staticmethod
+    def preload_related(borrows) -> None:
+        """Load the books and users of many borrows with one query each.
+
+        Afterwards get_book()/get_user() on these borrows need no database
+        access, so listing pages do not issue two queries per row. Books
+        already loaded by the borrow query are not fetched again.
+        """
+        from models.user import User
+        books = Book.get_by_ids(b.book_id for b in borrows if b._book is None)
+        users = User.get_by_ids(b.user_id for b in borrows if b._user is None)
+        for borrow in borrows:
+            if borrow._book is None:
+                borrow._book = books.get(borrow.book_id)
+            if borrow._user is None:
+                borrow._user = users.get(borrow.user_id)
 
     # ==================== STATISTICAL METHODS (Restored for Dashboard) ====================
     
@@ -218,21 +384,28 @@ class Borrow:
     def get_active_borrows_count() -> int:
         """Get total count of active borrows (borrowed + pending).
         Used by Staff/Admin dashboards.
+
+        Reads the trigger-maintained borrow_counters rows instead of
+        counting the borrows table.
         """
         db = get_db()
         # Include both 'borrowed', 'pending_pickup' and legacy 'waiting'
         row = db.execute(
-            "SELECT COUNT(*) as count FROM borrows WHERE status IN ('borrowed', 'pending_pickup', 'waiting')"
+            "SELECT COALESCE(SUM(value), 0) FROM borrow_counters "
+            "WHERE key IN ('borrowed', 'pending_pickup', 'waiting')"
         ).fetchone()
-        return row['count']
+        return row[0]
 
     @staticmethod
     def get_overdue_count() -> int:
         """Get total count of overdue books.
         Used by Staff/Admin dashboards.
+
+        Overdue depends on the current time, so it is counted on demand;
+        idx_borrows_status_due limits this to the overdue index range.
         """
         db = get_db()
-        today = datetime.now().strftime('%Y-%m-%d')
+        today = _today_str()
         row = db.execute(
             "SELECT COUNT(*) as count FROM borrows WHERE status = 'borrowed' AND due_date < ?",
             (today,)
@@ -244,7 +417,6 @@ class Borrow:
     @staticmethod
     def create(user_id, book_id):
         """Create new borrow request with DIRECT PENDING status."""
-        import uuid
         db = get_db()
         
         # Validation 1: Check book availability
@@ -254,15 +426,21 @@ class Borrow:
         if book.available_copies <= 0:
             return None, "Book is not available. Please reserve it instead."
         
+        # Validations 2 and 3 from one aggregate over the user's active
+        # borrows (idx_borrows_user_status_date), without loading them
+        active = db.execute('''
+            SELECT COUNT(*) AS total, COALESCE(SUM(book_id = ?), 0) AS same_book
+            FROM borrows
+            WHERE user_id = ? AND status IN ('borrowed', 'pending_pickup')
+        ''', (book_id, user_id)).fetchone()
+        
         # Validation 2: Check user borrow limit (max 5 books)
-        active_borrows = Borrow.get_active_borrows(user_id)
-        if len(active_borrows) >= Config.MAX_BORROW_LIMIT:
+        if active['total'] >= Config.MAX_BORROW_LIMIT:
             return None, f"You have reached the maximum borrow limit of {Config.MAX_BORROW_LIMIT} books"
         
         # Validation 3: Check if user already borrowed/requested this book
-        for borrow in active_borrows:
-            if borrow.book_id == book_id:
-                return None, "You have already borrowed or requested this book"
+        if active['same_book']:
+            return None, "You have already borrowed or requested this book"
         
         # Validation 4: Check for unpaid fines
         from models.user import User
@@ -271,42 +449,42 @@ class Borrow:
             return None, f"Please pay your outstanding fine of {user.fines:,.0f} VND before borrowing"
         
         # Generate IDs and timestamps
-        borrow_id = str(uuid.uuid4())
+        borrow_id = _new_borrow_id()
         now = datetime.now()
-        borrow_date = now.strftime('%Y-%m-%d %H:%M:%S')
+        borrow_date = _format_datetime(now)
         
         # Set pending_until = now + 48 hours (user must pickup within this time)
-        pending_until = (now + timedelta(hours=Config.PENDING_PICKUP_HOURS)).strftime('%Y-%m-%d %H:%M:%S')
+        pending_until = _format_datetime(now + timedelta(hours=Config.PENDING_PICKUP_HOURS))
         
         # Note: due_date will be set later when staff approves pickup
-        estimated_due_date = (now + timedelta(days=Config.BORROW_DURATION_DAYS)).strftime('%Y-%m-%d %H:%M:%S')
+        estimated_due_date = _format_datetime(now + timedelta(days=Config.BORROW_DURATION_DAYS))
         
         try:
-            # Create borrow record with status='pending_pickup'
-            db.execute('''
-                INSERT INTO borrows (id, user_id, book_id, borrow_date, due_date, 
-                                   return_date, status, renewed_count, pending_until,
-                                   condition, damage_fee, late_fee)
-                VALUES (?, ?, ?, ?, ?, NULL, 'pending_pickup', 0, ?, NULL, 0, 0)
-            ''', (borrow_id, user_id, book_id, borrow_date, estimated_due_date, pending_until))
+            # CRITICAL: Take the copy first; the conditional update fails if
+            # another request got the last one since the check above
+            if not book.record_borrow(commit=False):
+                return None, "Book is not available. Please reserve it instead."
             
-            # CRITICAL: Decrease available_copies immediately to reserve the book
-            book.update_available_copies(-1)
-            book.increment_borrow_count()
-            
-            db.commit()
+            # Create borrow record with status='pending_pickup'
+            row = db.execute(_INSERT_BORROW_SQL, (borrow_id, user_id, book_id, borrow_date, estimated_due_date, pending_until)).fetchone()
+            borrow = Borrow(*row)
+            borrow._book = book
+            borrow._user = user
             
-            # Log the action
+            # Log the action in the same transaction
             from models.system_log import SystemLog
             if user:
                 SystemLog.add(
                     'Book Hold Created',
                     f'{user.name} created pending pickup for "{book.title}" (Must pickup by {pending_until})',
                     'info',
-                    user_id
+                    user_id,
+                    commit=False
                 )
             
-            return Borrow.get_by_id(borrow_id), f"Book reserved! Please pick it up within 48 hours (by {pending_until})"
+            db.commit()
+            
+            return borrow, f"Book reserved! Please pick it up within 48 hours (by {pending_until})"
             
         except Exception as e:
             db.rollback()
@@ -332,10 +510,7 @@ class Borrow:
 
         # Check if pickup deadline has passed
         if self.pending_until:
-            deadline = datetime.strptime(
-                self.pending_until, '%Y-%m-%d %H:%M:%S'
-            )
-            if datetime.now() > deadline:
+            if datetime.now() > _parse_datetime(self.pending_until):
                 self.cancel()
                 return False, ("Pickup deadline has passed. "
                              "Request has been cancelled.")
@@ -343,33 +518,32 @@ class Borrow:
         db = get_db()
         now = datetime.now()
 
-        # Update status to 'borrowed'
-        self.status = 'borrowed'
-
         # CRITICAL: Set due_date = NOW + 7 days
-        self.due_date = (
+        due_date = _format_datetime(
             now + timedelta(days=Config.BORROW_DURATION_DAYS)
-        ).strftime('%Y-%m-%d %H:%M:%S')
+        )
 
-        db.execute('''
-            UPDATE borrows
-            SET status = ?, due_date = ?
-            WHERE id = ?
-        ''', ('borrowed', self.due_date, self.id))
-        db.commit()
+        # Update status to 'borrowed'; the status guard makes a concurrent
+        # approve/cancel of the same request a no-op instead of a double write
+        row = db.execute(_APPROVE_PICKUP_SQL, (due_date, self.id)).fetchone()
+        if row is None:
+            db.rollback()
+            return False, "Only pending pickup requests can be approved"
+        self._refresh(row)
 
         # Log pickup confirmation
         from models.system_log import SystemLog
-        from models.user import User
-        user = User.get_by_id(self.user_id)
-        book = Book.get_by_id(self.book_id)
+        user = self.get_user()
+        book = self.get_book()
         if user and book:
             SystemLog.add(
                 'Book Pickup Confirmed',
                 f'{user.name} picked up "{book.title}" (Due: {self.due_date})',
                 'info',
-                self.user_id
+                self.user_id,
+                commit=False
             )
+        db.commit()
 
         return True, f"Book pickup confirmed! Please return by {self.due_date}"
 
@@ -378,51 +552,60 @@ class Borrow:
         if self.status != 'borrowed':
             return False, "Only borrowed books can be returned"
 
-        from models.user import User
         from models.reservation import Reservation
         from models.system_log import SystemLog
         from models.fine import Fine
 
         db = get_db()
         return_timestamp = datetime.now()
-        self.return_date = return_timestamp.strftime('%Y-%m-%d %H:%M:%S')
-        self.status = 'returned'
-        self.condition = condition
 
         # Calculate late fee with grace period
-        due_timestamp = datetime.strptime(self.due_date, '%Y-%m-%d %H:%M:%S')
-        self.late_fee = self.calculate_late_fee(due_timestamp, return_timestamp)
+        late_fee = self.calculate_late_fee(self._due_dt, return_timestamp)
 
         # Calculate damage fee
-        self.damage_fee = self.calculate_damage_fee(condition, book_value)
-
-        # Update database
-        db.execute('''
-            UPDATE borrows
-            SET status = ?, return_date = ?, condition = ?,
-                late_fee = ?, damage_fee = ?
-            WHERE id = ?
-        ''', (self.status, self.return_date, self.condition,
-              self.late_fee, self.damage_fee, self.id))
-
-        # Return book to inventory
-        book = Book.get_by_id(self.book_id)
-        if book:
-            book.update_available_copies(1)
+        damage_fee = self.calculate_damage_fee(condition, book_value)
 
-        # Apply fines to user account and create Fine record
-        total_fine = self.late_fee + self.damage_fee
-        if total_fine > 0:
-            user = User.get_by_id(self.user_id)
-            if user:
-                user.add_fine(total_fine)
-                user.add_violation()
+        book = self.get_book()
+        user = self.get_user()
+        total_fine = late_fee + damage_fee
+
+        # The status change, inventory, fines and log commit together
+        try:
+            row = db.execute(_RETURN_SQL, (_format_datetime(return_timestamp),
+                                           condition, late_fee, damage_fee,
+                                           self.id)).fetchone()
+            if row is None:
+                db.rollback()
+                return False, "Only borrowed books can be returned"
+            self._refresh(row)
+
+            # Return book to inventory
+            if book:
+                book.record_return(commit=False)
+
+            # Apply fines to user account and create Fine record
+            if total_fine > 0 and user:
+                user.add_fine(total_fine, commit=False)
+                user.add_violation(commit=False)
                 # Create Fine object automatically
                 fine_reason = f"Return fees (Late: {self.late_fee:,.0f} VND, "
                 fine_reason += f"Damage: {self.damage_fee:,.0f} VND)"
-                Fine.create(self.user_id, total_fine, fine_reason, self.id)
+                Fine.create(self.user_id, total_fine, fine_reason, self.id,
+                            commit=False)
+
+            # Log return
+            if user and book:
+                details = f'{user.name} returned "{book.title}" (Condition: {condition}'
+                if total_fine > 0:
+                    details += f', Total Fine: {total_fine:,.0f} VND'
+                details += ')'
+                SystemLog.add('Book Returned', details, 'info', self.user_id,
+                              commit=False)
 
-        db.commit()
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
 
         # Check for reservations and notify next in queue
         if Reservation.has_active_reservations(self.book_id):
@@ -430,15 +613,6 @@ class Borrow:
             if next_reservation:
                 next_reservation.mark_ready(hold_hours=48)
 
-        # Log return
-        user = User.get_by_id(self.user_id)
-        if user and book:
-            details = f'{user.name} returned "{book.title}" (Condition: {condition}'
-            if total_fine > 0:
-                details += f', Total Fine: {total_fine:,.0f} VND'
-            details += ')'
-            SystemLog.add('Book Returned', details, 'info', self.user_id)
-
         message = f"Book returned successfully"
         if total_fine > 0:
             message += f". Late fee: {self.late_fee:,.0f} VND, "
@@ -455,7 +629,7 @@ class Borrow:
             return False, "Maximum renewal limit (1 time) has been reached"
 
         # Check if book is overdue
-        due_timestamp = datetime.strptime(self.due_date, '%Y-%m-%d %H:%M:%S')
+        due_timestamp = self._due_dt
         if datetime.now() > due_timestamp:
             return False, "Overdue books cannot be renewed"
 
@@ -466,27 +640,30 @@ class Borrow:
 
         # Extend due date by 7 days
         new_due_timestamp = due_timestamp + timedelta(days=extension_days)
-        self.due_date = new_due_timestamp.strftime('%Y-%m-%d %H:%M:%S')
-        self.renewed_count += 1
 
+        # Guarding on the renewal count read above stops two concurrent
+        # renewals from both succeeding
         db = get_db()
-        db.execute('''
-            UPDATE borrows SET due_date = ?, renewed_count = ? WHERE id = ?
-        ''', (self.due_date, self.renewed_count, self.id))
-        db.commit()
+        row = db.execute(_RENEW_SQL, (_format_datetime(new_due_timestamp),
+                                      self.id, self.renewed_count)).fetchone()
+        if row is None:
+            db.rollback()
+            return False, "This borrow has already been renewed or returned"
+        self._refresh(row)
 
         # Log renewal
         from models.system_log import SystemLog
-        from models.user import User
-        user = User.get_by_id(self.user_id)
-        book = Book.get_by_id(self.book_id)
+        user = self.get_user()
+        book = self.get_book()
         if user and book:
             SystemLog.add(
                 'Book Renewal',
                 f'{user.name} renewed "{book.title}" (New due: {self.due_date})',
                 'info',
-                self.user_id
+                self.user_id,
+                commit=False
             )
+        db.commit()
 
         return True, f"Book renewed successfully. New due date: {self.due_date}"
     
@@ -502,41 +679,24 @@ class Borrow:
         from models.system_log import SystemLog
         
         db = get_db()
-        self.status = 'cancelled'
 
-        # Update status
-        db.execute(
-            'UPDATE borrows SET status = ? WHERE id = ?',
-            ('cancelled', self.id)
-        )
+        # Update status, unless it was already picked up or cancelled
+        row = db.execute(_CANCEL_SQL, (self.id,)).fetchone()
+        if row is None:
+            db.rollback()
+            return False, "Only pending pickup requests can be cancelled"
+        self._refresh(row)
 
         # Return book to available inventory
-        book = Book.get_by_id(self.book_id)
+        book = self.get_book()
         if book:
-            book.update_available_copies(1)
+            book.record_return(commit=False)
 
         # ✅ FIXED: Reorder reservation queue if applicable
-        if Reservation.has_active_reservations(self.book_id):
-            # Get all waiting reservations for this book
-            waiting_reservations = db.execute('''
-                SELECT * FROM reservations 
-                WHERE book_id = ? AND status = 'waiting'
-                ORDER BY queue_position ASC
-            ''', (self.book_id,)).fetchall()
-            
+        has_queue = Reservation.has_active_reservations(self.book_id)
+        if has_queue:
             # Reorder queue positions
-            for idx, res_row in enumerate(waiting_reservations, start=1):
-                db.execute(
-                    'UPDATE reservations SET queue_position = ? WHERE id = ?',
-                    (idx, res_row['id'])
-                )
-            
-            # Notify first person in queue
-            first_reservation = Reservation.get_next_in_queue(self.book_id)
-            if first_reservation:
-                first_reservation.mark_ready(hold_hours=48)
-
-        db.commit()
+            Reservation.reorder_queues([self.book_id], commit=False)
 
         # Log the cancellation
         user = self.get_user()
@@ -545,38 +705,81 @@ class Borrow:
                 'Borrow Request Cancelled',
                 f'{user.name} cancelled pending pickup for "{book.title}"',
                 'info',
-                self.user_id
+                self.user_id,
+                commit=False
             )
 
+        db.commit()
+
+        # Notify first person in queue
+        if has_queue:
+            first_reservation = Reservation.get_next_in_queue(self.book_id)
+            if first_reservation:
+                first_reservation.mark_ready(hold_hours=48)
+
         return True, "Borrow request cancelled successfully"
     
     @staticmethod
-    def auto_cancel_expired_pickups():
+    def auto_cancel_expired_pickups() -> List[Any]:
         """Auto-cancel all pickup requests that exceeded 48-hour deadline.
         
         This should be run periodically (e.g., every hour) as a background job.
         
         Returns:
-            Number of expired pickups cancelled.
+            Rows (id, book_id, user_id, name, title) of the pickups actually
+            cancelled; name/title are None if the user/book no longer exists.
         """
+        from models.reservation import Reservation
+        from models.system_log import SystemLog
+        
         db = get_db()
-        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        now = _now_str()
         
-        # Find all expired pending pickups
-        expired_rows = db.execute('''
-            SELECT id FROM borrows
-            WHERE status = 'pending_pickup' AND pending_until < ?
+        # Find all expired pending pickups, with the names used in the logs
+        expired = db.execute('''
+            SELECT b.id, b.book_id, b.user_id, u.name, bk.title
+            FROM borrows b
+            LEFT JOIN users u ON u.id = b.user_id
+            LEFT JOIN books bk ON bk.id = b.book_id
+            WHERE b.status = 'pending_pickup' AND b.pending_until < ?
         ''', (now,)).fetchall()
+        if not expired:
+            return []
         
-        cancelled_count = 0
-        for row in expired_rows:
-            borrow = Borrow.get_by_id(row['id'])
-            if borrow:
-                success, _ = borrow.cancel()
-                if success:
-                    cancelled_count += 1
+        # Cancel everything in one transaction. Each cancel is guarded on
+        # the status, so a pickup approved since the SELECT above is left
+        # alone; only rows actually cancelled count towards the rest
+        with db:
+            cancelled = [row for row in expired
+                         if db.execute(_CANCEL_SQL, (row['id'],)).fetchone()]
+            if not cancelled:
+                return []
+            
+            # Copies to put back per book, in one executemany()
+            book_deltas = Counter(row['book_id'] for row in cancelled)
+            Book.bulk_update_available(
+                [(delta, book_id) for book_id, delta in book_deltas.items()],
+                commit=False
+            )
+            Reservation.reorder_queues(book_deltas, commit=False)
+            for row in cancelled:
+                if row['name'] and row['title']:
+                    SystemLog.add(
+                        'Borrow Request Cancelled',
+                        f'{row["name"]} cancelled pending pickup for "{row["title"]}"',
+                        'info',
+                        row['user_id'],
+                        commit=False
+                    )
+        # Hand each freed copy to the next reserver in line
+        for book_id, delta in book_deltas.items():
+            for _ in range(delta):
+                next_reservation = Reservation.get_next_in_queue(book_id)
+                if next_reservation is None:
+                    break
+                next_reservation.mark_ready(hold_hours=48)
         
-        return cancelled_count
+        return cancelled
 
     @staticmethod
     def get_user_reserved_books(user_id: str) -> list:
@@ -596,52 +799,66 @@ class Borrow:
 
     @staticmethod
     def get_user_borrowed_books(user_id: str) -> list:
-        """Get all borrowed books for a user (including pending_pickup)."""
-        borrowed = Borrow.get_user_borrows(user_id, status='borrowed')
-        pending = Borrow.get_user_borrows(user_id, status='pending_pickup')
-        return borrowed + pending
+        """Get all borrowed books for a user (including pending_pickup).
+
+        Borrowed books come first, then pending pickups, each newest first;
+        'borrowed' sorts before 'pending_pickup', so one query ordered by
+        status keeps that layout.
+        """
+        db = get_db()
+        rows = db.execute(_BORROWED_AND_PENDING_SQL, (user_id,)).fetchall()
+        return list(map(Borrow._from_row, rows))
 
     def get_book(self):
         """Get the book object"""
-        return Book.get_by_id(self.book_id)
+        if self._book is None:
+            self._book = Book.get_by_id(self.book_id)
+        return self._book
     
     def is_overdue(self):
         """Check if borrow is overdue"""
-        if self.status != 'borrowed':
-            return False
-        try:
-            # Try parsing with time first
-            due_date = datetime.strptime(self.due_date, '%Y-%m-%d %H:%M:%S')
-        except ValueError:
-            # Fallback to date only format
-            due_date = datetime.strptime(self.due_date, '%Y-%m-%d')
-        return datetime.now() > due_date
+        return self.status == 'borrowed' and datetime.now() > self._due_dt
     
     def get_overdue_days(self):
         """Get number of overdue days"""
         if not self.is_overdue():
             return 0
-        try:
-            # Try parsing with time first
-            due_date = datetime.strptime(self.due_date, '%Y-%m-%d %H:%M:%S')
-        except ValueError:
-            # Fallback to date only format
-            due_date = datetime.strptime(self.due_date, '%Y-%m-%d')
-        return (datetime.now() - due_date).days
+        return (datetime.now() - self._due_dt).days
     
     def get_fine_amount(self):
         """Calculate fine amount for overdue"""
         overdue_days = self.get_overdue_days()
         return overdue_days * Config.FINE_PER_DAY
     
+    def _compute_overdue_state(self, now: Optional[datetime] = None) -> Tuple[bool, int, float]:
+        """Work out is_overdue(), get_overdue_days() and get_fine_amount() at once.
+
+        Args:
+            now: Reference time. Defaults to datetime.now().
+
+        Returns:
+            Tuple of (is_overdue, overdue_days, fine_amount).
+        """
+        if self.status != 'borrowed':
+            return False, 0, 0
+        if now is None:
+            now = datetime.now()
+        if now <= self._due_dt:
+            return False, 0, 0
+        days = (now - self._due_dt).days
+        return True, days, days * Config.FINE_PER_DAY
+    
     def get_user(self):
         """Get user who borrowed the book"""
-        from models.user import User
-        return User.get_by_id(self.user_id)
+        if self._user is None:
+            from models.user import User
+            self._user = User.get_by_id(self.user_id)
+        return self._user
     
     def to_dict(self):
         """Convert borrow to dictionary"""
         book = self.get_book()
+        is_overdue, overdue_days, fine_amount = self._compute_overdue_state()
         return {
             'id': self.id,
             'user_id': self.user_id,
@@ -652,7 +869,7 @@ class Borrow:
             'return_date': self.return_date,
             'status': self.status,
             'renewed_count': self.renewed_count,
-            'is_overdue': self.is_overdue(),
-            'overdue_days': self.get_overdue_days(),
-            'fine_amount': self.get_fine_amount()
-        }
\ No newline at end of file
+            'is_overdue': is_overdue,
+            'overdue_days': overdue_days,
+            'fine_amount': fine_amount
+        }
@@ -3,11 +3,23 @@
 This module handles creating, retrieving, and managing
 chat messages between users and staff.
 """
+import logging
+import queue
+import sqlite3
+import time
 import uuid
 from datetime import datetime
 from typing import List, Optional
 
-from models.database import get_db
+from config.config import Config
+from models.database import close_db, get_db
+from models.unread_counts import UnreadCounts
+from utils.concurrency import run_blocking
+
+logger = logging.getLogger(__name__)
+
+# Messages waiting to be written by ChatMessage.run_persist_worker()
+_persist_queue: 'queue.Queue[ChatMessage]' = queue.Queue()
 
 
 class ChatMessage:
@@ -54,9 +66,118 @@ class ChatMessage:
             VALUES (?, ?, ?, ?, ?, 0)
         ''', (message_id, sender_id, receiver_id, message, timestamp))
         db.commit()
+        UnreadCounts.increment(receiver_id, UnreadCounts.MESSAGES)
 
         return ChatMessage.get_by_id(message_id)
 
+    @staticmethod
+    def build(sender_id: str, receiver_id: str, message: str) -> 'ChatMessage':
+        """Build an unsaved chat message with its final ID and timestamp.
+
+        Args:
+            sender_id: ID of the message sender.
+            receiver_id: ID of the message receiver.
+            message: Message content.
+
+        Returns:
+            ChatMessage instance not yet written to the database.
+        """
+        return ChatMessage(
+            str(uuid.uuid4()), sender_id, receiver_id, message,
+            datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 0
+        )
+
+    @staticmethod
+    def save_batch(messages: List['ChatMessage']) -> None:
+        """Insert several built messages in one transaction.
+
+        Args:
+            messages: Messages created with ChatMessage.build().
+        """
+        db = get_db()
+        try:
+            db.executemany('''
+                INSERT INTO chat_messages (id, sender_id, receiver_id, message, timestamp, is_read)
+                VALUES (?, ?, ?, ?, ?, 0)
+            ''', [(m.id, m.sender_id, m.receiver_id, m.message, m.timestamp)
+                  for m in messages])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        for m in messages:
+            UnreadCounts.increment(m.receiver_id, UnreadCounts.MESSAGES)
+
+    @staticmethod
+    def persist_batch(messages: List['ChatMessage']) -> None:
+        """Save a write-behind batch without losing it to a transient error.
+
+        Operational errors (e.g. a lock timeout) are retried with
+        exponential backoff. If the batch still fails, messages are saved one by one so
+        a single bad row cannot drop the rest; any message that cannot be
+        saved is logged with its content.
+
+        Args:
+            messages: Messages created with ChatMessage.build().
+        """
+        delay = Config.CHAT_PERSIST_RETRY_DELAY_SECONDS
+        for attempt in range(Config.CHAT_PERSIST_RETRIES + 1):
+            try:
+                ChatMessage.save_batch(messages)
+                return
+            except sqlite3.OperationalError as e:
+                logger.warning("Persisting %d chat messages failed (attempt %d): %s",
+                               len(messages), attempt + 1, e)
+            except sqlite3.Error as e:
+                # Not transient (e.g. a constraint violation): isolate the row
+                logger.warning("Persisting %d chat messages failed: %s",
+                               len(messages), e)
+                break
+            if attempt < Config.CHAT_PERSIST_RETRIES:
+                time.sleep(delay)
+                delay *= 2
+
+        for m in messages:
+            try:
+                ChatMessage.save_batch([m])
+            except sqlite3.Error as e:
+                logger.error("Dropped chat message %s (%s -> %s at %s): %r: %s",
+                             m.id, m.sender_id, m.receiver_id, m.timestamp,
+                             m.message, e)
+
+    @staticmethod
+    def run_persist_worker(app, batch_size: int = 100) -> None:
+        """Background loop writing queued messages to the database.
+
+        Blocks for the next queued message, then drains up to batch_size
+        more so bursts are written with a single executemany. The write,
+        including its retries, runs through run_blocking() so a slow or
+        locked database does not stall other SocketIO clients.
+
+        Args:
+            app: Flask application (for the app context / DB connection).
+            batch_size: Maximum messages per INSERT round-trip.
+        """
+        while True:
+            batch = [_persist_queue.get()]
+            while len(batch) < batch_size:
+                try:
+                    batch.append(_persist_queue.get_nowait())
+                except queue.Empty:
+                    break
+            run_blocking(ChatMessage._persist_in_context, app, batch)
+
+    @staticmethod
+    def _persist_in_context(app, batch: List['ChatMessage']) -> None:
+        """Run persist_batch() inside an app context of the calling thread."""
+        with app.app_context():
+            try:
+                ChatMessage.persist_batch(batch)
+            except Exception:
+                logger.exception("Error persisting chat messages")
+            finally:
+                close_db()
+
     @staticmethod
     def get_by_id(message_id: str) -> Optional['ChatMessage']:
         """Get message by ID.
@@ -105,18 +226,15 @@ class ChatMessage:
     def get_unread_count(user_id: str) -> int:
         """Get count of unread messages for a user.
 
+        Served from the cached unread counters when available.
+
         Args:
             user_id: User ID.
 
         Returns:
             Number of unread messages.
         """
-        db = get_db()
-        row = db.execute('''
-            SELECT COUNT(*) as count FROM chat_messages 
-            WHERE receiver_id = ? AND is_read = 0
-        ''', (user_id,)).fetchone()
-        return row['count']
+        return UnreadCounts.get_messages(user_id)
 
     @staticmethod
     def mark_as_read(user_id: str, sender_id: str) -> None:
@@ -127,12 +245,13 @@ class ChatMessage:
             sender_id: Sender user ID.
         """
         db = get_db()
-        db.execute('''
+        cursor = db.execute('''
             UPDATE chat_messages 
             SET is_read = 1 
-            WHERE receiver_id = ? AND sender_id = ?
+            WHERE receiver_id = ? AND sender_id = ? AND is_read = 0
         ''', (user_id, sender_id))
         db.commit()
+        UnreadCounts.decrement(user_id, UnreadCounts.MESSAGES, cursor.rowcount)
 
     @staticmethod
     def get_recent_conversations(user_id: str) -> List[dict]:
@@ -207,7 +326,7 @@ class ChatMessage:
 
     @staticmethod
     def send_message(sender_id: str, receiver_id: str,
-                     message: str) -> tuple:
+                     message: str, write_behind: bool = False) -> tuple:
         """Send a chat message with validation and offline handling.
         
         ✅ FIXED: Now handles offline receiver scenarios
@@ -216,6 +335,10 @@ class ChatMessage:
             sender_id: ID of the message sender.
             receiver_id: ID of the message receiver.
             message: Message text content.
+            write_behind: If True, return immediately and let the
+                background persist worker insert the message. The
+                receiver's presence is not looked up in this mode and
+                the status message is a plain "Message queued".
 
         Returns:
             Tuple of (ChatMessage or None, status message).
@@ -233,11 +356,18 @@ class ChatMessage:
 
         # ✅ FIXED: Create message regardless of receiver online status
         # Message persists in DB for offline users to read later
-        chat_message = ChatMessage.create(sender_id, receiver_id, message.strip())
+        if write_behind:
+            chat_message = ChatMessage.build(sender_id, receiver_id, message.strip())
+            _persist_queue.put(chat_message)
+            # Hot SocketIO path: skip the presence lookup (a Redis round-trip)
+            # that would only produce a status string the caller ignores
+            return chat_message, "Message queued"
+        else:
+            chat_message = ChatMessage.create(sender_id, receiver_id, message.strip())
         
         if chat_message:
             # Check if receiver is online
-            from app import online_users  # Import online_users from app.py
+            from extensions import online_users
             
             if receiver_id not in online_users:
                 # ✅ FIXED: Mark message as pending/unread for offline users
@@ -282,8 +412,7 @@ class ChatMessage:
         Returns:
             Dict with availability info
         """
-        from app import online_users
-        from models.user import User
+        from extensions import online_users
         
         db = get_db()
         
@@ -296,9 +425,10 @@ class ChatMessage:
         
         available_staff = []
         offline_staff = []
+        online_ids = online_users.filter_online(staff['id'] for staff in staff_list)
         
         for staff in staff_list:
-            if staff['id'] in online_users:
+            if staff['id'] in online_ids:
                 available_staff.append({
                     'id': staff['id'],
                     'name': staff['name'],
@@ -6,26 +6,32 @@ and sample data loading for the library management system.
 import csv
 import os
 import sqlite3
-from typing import Optional
+from functools import wraps
+from typing import Any, Callable, Iterable, Iterator, List, Optional
 
-from flask import g
+from flask import g, has_app_context
 
-from config.config import Config
+from config.config import BASE_DIR, Config
 
 
 def get_db() -> sqlite3.Connection:
     """Get database connection from Flask application context.
 
+    The connection is opened once per app context (i.e. per request) and
+    reused by every model call; close_db() releases it on teardown.
+
     Returns:
         SQLite database connection with Row factory enabled.
     """
     if 'db' not in g:
-        os.makedirs(os.path.dirname(Config.DATABASE_PATH), exist_ok=True)
         g.db = sqlite3.connect(
             Config.DATABASE_PATH,
-            detect_types=sqlite3.PARSE_DECLTYPES
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            **Config.SQLITE_CONNECT_OPTIONS
         )
         g.db.row_factory = sqlite3.Row
+        for pragma, value in Config.SQLITE_PRAGMAS.items():
+            g.db.execute(f'PRAGMA {pragma} = {value}')
     return g.db
 
 
@@ -36,10 +42,95 @@ def close_db(e=None):
         db.close()
 
 
+# Bound parameters per "IN (...)" query, safely below SQLite's variable limit
+MAX_IN_PARAMS = 500
+
+
+def chunked(items: Iterable[Any], size: int = MAX_IN_PARAMS) -> Iterator[List[Any]]:
+    """Split distinct values into lists small enough for one IN (...) query.
+
+    Args:
+        items: Values to split; duplicates are dropped.
+        size: Maximum values per chunk.
+
+    Yields:
+        Lists of at most ``size`` values.
+    """
+    values = list(dict.fromkeys(items))
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def request_cached(kind: str) -> Callable:
+    """Memoize a ``get_by_id``-style lookup for the rest of the request.
+
+    Results (including misses) are kept in ``g._id_cache[kind]``, so the
+    same ID looked up twice in one request costs one query. Callers that
+    change rows behind the model's back must call forget_cached().
+
+    Args:
+        kind: Cache namespace, normally the model class name.
+
+    Returns:
+        Decorator for a function taking a single ID argument.
+    """
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(obj_id: Any):
+            if not has_app_context():
+                return func(obj_id)
+            memo = g.setdefault('_id_cache', {}).setdefault(kind, {})
+            if obj_id not in memo:
+                memo[obj_id] = func(obj_id)
+            return memo[obj_id]
+        return wrapper
+    return decorator
+
+
+def forget_cached(kind: str, obj_id: Optional[Any] = None) -> None:
+    """Drop request-cached lookups of one ID, or of a whole kind.
+
+    Args:
+        kind: Cache namespace passed to request_cached().
+        obj_id: ID to forget; None forgets every entry of the kind.
+    """
+    if not has_app_context():
+        return
+    memo = g.get('_id_cache', {}).get(kind)
+    if memo is None:
+        return
+    if obj_id is None:
+        memo.clear()
+    else:
+        memo.pop(obj_id, None)
+
+
+def remember_cached(kind: str, obj_id: Any, value: Any) -> None:
+    """Store a fresh object as the request-cached lookup of its ID.
+
+    Write-through counterpart of forget_cached(): after a model updates
+    an instance in place, later lookups in the request get that instance
+    instead of a stale copy or another query.
+
+    Args:
+        kind: Cache namespace passed to request_cached().
+        obj_id: ID the object is looked up by.
+        value: The up-to-date object.
+    """
+    if not has_app_context():
+        return
+    g.setdefault('_id_cache', {}).setdefault(kind, {})[obj_id] = value
+
+
 def init_db():
     """Initialize database with schema"""
+    os.makedirs(os.path.dirname(Config.DATABASE_PATH), exist_ok=True)
     db = get_db()
     
+    # Write-ahead logging is stored in the database file, so setting it
+    # once here applies to every later connection
+    db.execute('PRAGMA journal_mode = WAL')
+    
     # Create users table
     db.execute('''
         CREATE TABLE IF NOT EXISTS users (
@@ -194,12 +285,202 @@ def init_db():
         )
     ''')
     
+    # Indexes for the per-page unread counters
+    db.execute('''
+        CREATE INDEX IF NOT EXISTS idx_chat_messages_receiver_read
+        ON chat_messages (receiver_id, is_read)
+    ''')
+    db.execute('''
+        CREATE INDEX IF NOT EXISTS idx_notifications_user_read
+        ON notifications (user_id, is_read)
+    ''')
+    
+    # Covers the rating aggregate on the book detail page
+    db.execute('''
+        CREATE INDEX IF NOT EXISTS idx_reviews_book_rating
+        ON reviews (book_id, rating)
+    ''')
+    
+    # A user's own review of a book, looked up on every book detail page
+    db.execute('''
+        CREATE INDEX IF NOT EXISTS idx_reviews_user_book
+        ON reviews (user_id, book_id)
+    ''')
+    
+    # Borrow lookups: per-user lists filtered by status and sorted by due
+    # date, and the global overdue / status scans
+    db.execute('''
+        CREATE INDEX IF NOT EXISTS idx_borrows_user_status_due
+        ON borrows (user_id, status, due_date)
+    ''')
+    db.execute('''
+        CREATE INDEX IF NOT EXISTS idx_borrows_status_due
+        ON borrows (status, due_date)
+    ''')
+    db.execute('''
+        CREATE INDEX IF NOT EXISTS idx_borrows_user_book_status
+        ON borrows (user_id, book_id, status)
+    ''')
+    # Per-user lists sorted by borrow date, newest first
+    db.execute('''
+        CREATE INDEX IF NOT EXISTS idx_borrows_user_status_date
+        ON borrows (user_id, status, borrow_date DESC)
+    ''')
+    # Expired pickup sweep; only pending pickups are indexed
+    db.execute('''
+        CREATE INDEX IF NOT EXISTS idx_borrows_pending_until
+        ON borrows (pending_until) WHERE status = 'pending_pickup'
+    ''')
+    
+    # Home page top-N lists (ORDER BY ... DESC LIMIT n) walk these instead
+    # of sorting the table; the category index also covers the category
+    # filter and the DISTINCT category list
+    db.execute('CREATE INDEX IF NOT EXISTS idx_books_year ON books (year DESC)')
+    db.execute('''
+        CREATE INDEX IF NOT EXISTS idx_books_borrow_count
+        ON books (borrow_count DESC)
+    ''')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_books_rating ON books (rating DESC)')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_books_category ON books (category)')
+    
+    # Exact (case-insensitive) search on a field and ISBN lookups
+    for column in ('title', 'author', 'category'):
+        db.execute(f'''
+            CREATE INDEX IF NOT EXISTS idx_books_{column}_nocase
+            ON books ({column} COLLATE NOCASE)
+        ''')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_books_isbn ON books (isbn)')
+    
+    # Full-text index for book search. The trigram tokenizer matches
+    # case-insensitive substrings (like the old LIKE '%q%') from the index.
+    init_books_fts(db)
+    
+    # Trigger-maintained catalog size, so counting books is a point read
+    init_book_stats(db)
+    
+    # Trigger-maintained borrow counts per status, for the dashboards
+    init_borrow_counters(db)
+    
     db.commit()
     
     # Insert mock data
     insert_mock_data(db)
 
 
+def init_books_fts(db: sqlite3.Connection) -> None:
+    """Create the books_fts index and the triggers keeping it in sync.
+
+    The index is an external-content FTS5 table over books.rowid; it is
+    rebuilt from the books table the first time it is created.
+    """
+    exists = db.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'books_fts'"
+    ).fetchone()
+    
+    db.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+            title, author, category,
+            content='books', content_rowid='rowid', tokenize='trigram'
+        )
+    ''')
+    db.execute('''
+        CREATE TRIGGER IF NOT EXISTS books_fts_insert AFTER INSERT ON books BEGIN
+            INSERT INTO books_fts (rowid, title, author, category)
+            VALUES (new.rowid, new.title, new.author, new.category);
+        END
+    ''')
+    db.execute('''
+        CREATE TRIGGER IF NOT EXISTS books_fts_delete AFTER DELETE ON books BEGIN
+            INSERT INTO books_fts (books_fts, rowid, title, author, category)
+            VALUES ('delete', old.rowid, old.title, old.author, old.category);
+        END
+    ''')
+    db.execute('''
+        CREATE TRIGGER IF NOT EXISTS books_fts_update
+        AFTER UPDATE OF title, author, category ON books BEGIN
+            INSERT INTO books_fts (books_fts, rowid, title, author, category)
+            VALUES ('delete', old.rowid, old.title, old.author, old.category);
+            INSERT INTO books_fts (rowid, title, author, category)
+            VALUES (new.rowid, new.title, new.author, new.category);
+        END
+    ''')
+    
+    if not exists:
+        db.execute("INSERT INTO books_fts (books_fts) VALUES ('rebuild')")
+
+
+def init_book_stats(db: sqlite3.Connection) -> None:
+    """Create the single-row book_stats counter and its triggers.
+
+    The total is seeded from the books table when the row is first
+    inserted; afterwards the INSERT/DELETE triggers keep it current.
+    """
+    db.execute('''
+        CREATE TABLE IF NOT EXISTS book_stats (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            total INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    db.execute('''
+        INSERT OR IGNORE INTO book_stats (id, total)
+        VALUES (1, (SELECT COUNT(*) FROM books))
+    ''')
+    db.execute('''
+        CREATE TRIGGER IF NOT EXISTS book_stats_insert AFTER INSERT ON books BEGIN
+            UPDATE book_stats SET total = total + 1 WHERE id = 1;
+        END
+    ''')
+    db.execute('''
+        CREATE TRIGGER IF NOT EXISTS book_stats_delete AFTER DELETE ON books BEGIN
+            UPDATE book_stats SET total = total - 1 WHERE id = 1;
+        END
+    ''')
+
+
+def init_borrow_counters(db: sqlite3.Connection) -> None:
+    """Create the borrow_counters table (status -> row count) and its triggers.
+
+    The counts are seeded from the borrows table when the table is first
+    created; afterwards the INSERT/DELETE/status-UPDATE triggers keep them
+    current in the same transaction as the borrow change.
+    """
+    exists = db.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'borrow_counters'"
+    ).fetchone()
+    
+    db.execute('''
+        CREATE TABLE IF NOT EXISTS borrow_counters (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    db.execute('''
+        CREATE TRIGGER IF NOT EXISTS borrow_counters_insert AFTER INSERT ON borrows BEGIN
+            INSERT INTO borrow_counters (key, value) VALUES (new.status, 1)
+            ON CONFLICT (key) DO UPDATE SET value = value + 1;
+        END
+    ''')
+    db.execute('''
+        CREATE TRIGGER IF NOT EXISTS borrow_counters_delete AFTER DELETE ON borrows BEGIN
+            UPDATE borrow_counters SET value = value - 1 WHERE key = old.status;
+        END
+    ''')
+    db.execute('''
+        CREATE TRIGGER IF NOT EXISTS borrow_counters_update
+        AFTER UPDATE OF status ON borrows WHEN old.status IS NOT new.status BEGIN
+            UPDATE borrow_counters SET value = value - 1 WHERE key = old.status;
+            INSERT INTO borrow_counters (key, value) VALUES (new.status, 1)
+            ON CONFLICT (key) DO UPDATE SET value = value + 1;
+        END
+    ''')
+    
+    if not exists:
+        db.execute('''
+            INSERT INTO borrow_counters (key, value)
+            SELECT status, COUNT(*) FROM borrows GROUP BY status
+        ''')
+
+
 def insert_mock_data(db):
     """Insert mock data for testing"""
     import json
@@ -269,7 +550,7 @@ def insert_mock_data(db):
     
     # Load books from CSV file
     books = []
-    csv_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), '..', 'books_clean_top100_1.csv')
+    csv_file = BASE_DIR.parent / 'books_clean_top100_1.csv'
     
     try:
         with open(csv_file, 'r', encoding='utf-8-sig', errors='ignore') as f:
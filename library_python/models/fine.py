@@ -15,7 +15,7 @@ class Fine:
         self.status = status
 
     @staticmethod
-    def create(user_id, amount, reason, borrow_id=None):
+    def create(user_id, amount, reason, borrow_id=None, commit=True):
         """Create violation record and track fine amount.
         
         ✅ FIXED: Properly handles violations_history table creation
@@ -25,6 +25,9 @@ class Fine:
             amount: Fine amount (VND)
             reason: Reason for fine (late fee, damage, etc.)
             borrow_id: Associated borrow transaction ID
+            commit: Commit immediately; pass False to let the caller
+                commit this together with other writes (errors are then
+                raised instead of rolled back)
             
         Returns:
             fine_id if successful, None otherwise
@@ -54,10 +57,16 @@ class Fine:
                 (amount, user_id)
             )
             
-            db.commit()
+            if commit:
+                db.commit()
+            
+            from models.user import User
+            User.invalidate_cache(user_id)
             
             return fine_id
         except Exception as e:
+            if not commit:
+                raise
             db.rollback()
             print(f"Error creating fine: {e}")
             return None
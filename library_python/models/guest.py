@@ -20,17 +20,10 @@ class Guest:
         return False
     
     # Hỗ trợ các thuộc tính chuẩn của Flask-Login (nếu template cần)
-    @property
-    def is_authenticated(self):
-        return False
-    
-    @property
-    def is_active(self):
-        return False
-    
-    @property
-    def is_anonymous(self):
-        return True
+    # Plain class attributes: checked on every request, no property call
+    is_authenticated = False
+    is_active = False
+    is_anonymous = True
     
     def get_id(self):
         return None
@@ -8,6 +8,16 @@ from datetime import datetime
 from typing import List, Optional
 
 from models.database import get_db
+from models.unread_counts import UnreadCounts
+
+# SQL expression producing a random version-4 UUID string (same format as
+# str(uuid.uuid4())), for IDs of rows created by INSERT ... SELECT
+_SQL_UUID4 = (
+    "lower(hex(randomblob(4)) || '-' || hex(randomblob(2)) || '-4' || "
+    "substr(hex(randomblob(2)), 2) || '-' || "
+    "substr('89ab', 1 + abs(random()) % 4, 1) || "
+    "substr(hex(randomblob(2)), 2) || '-' || hex(randomblob(6)))"
+)
 
 
 class Notification:
@@ -50,6 +60,7 @@ class Notification:
             VALUES (?, ?, ?, ?, ?, ?, 0)
         ''', (notification_id, user_id, notification_type, title, message, date))
         db.commit()
+        UnreadCounts.increment(user_id, UnreadCounts.NOTIFICATIONS)
 
         return Notification.get_by_id(notification_id)
 
@@ -80,67 +91,91 @@ class Notification:
 
     @staticmethod
     def get_unread_count(user_id: str) -> int:
-        """Get count of unread notifications."""
-        db = get_db()
-        row = db.execute('''
-            SELECT COUNT(*) as count FROM notifications 
-            WHERE user_id = ? AND is_read = 0
-        ''', (user_id,)).fetchone()
-        return row['count']
+        """Get count of unread notifications (cached when available)."""
+        return UnreadCounts.get_notifications(user_id)
 
     @staticmethod
     def mark_as_read(notification_id: str) -> None:
         """Mark notification as read."""
         db = get_db()
-        db.execute(
-            'UPDATE notifications SET is_read = 1 WHERE id = ?',
+        row = db.execute(
+            'UPDATE notifications SET is_read = 1 '
+            'WHERE id = ? AND is_read = 0 RETURNING user_id',
             (notification_id,)
-        )
+        ).fetchone()
         db.commit()
+        if row:
+            UnreadCounts.decrement(row['user_id'], UnreadCounts.NOTIFICATIONS)
 
     @staticmethod
     def mark_all_as_read(user_id: str) -> None:
         """Mark all notifications as read for a user."""
         db = get_db()
-        db.execute(
-            'UPDATE notifications SET is_read = 1 WHERE user_id = ?',
+        cursor = db.execute(
+            'UPDATE notifications SET is_read = 1 WHERE user_id = ? AND is_read = 0',
             (user_id,)
         )
         db.commit()
+        UnreadCounts.decrement(user_id, UnreadCounts.NOTIFICATIONS, cursor.rowcount)
 
     @staticmethod
     def delete(notification_id: str) -> None:
         """Delete a notification."""
         db = get_db()
-        db.execute('DELETE FROM notifications WHERE id = ?', (notification_id,))
+        row = db.execute(
+            'DELETE FROM notifications WHERE id = ? RETURNING user_id, is_read',
+            (notification_id,)
+        ).fetchone()
         db.commit()
+        if row and not row['is_read']:
+            UnreadCounts.decrement(row['user_id'], UnreadCounts.NOTIFICATIONS)
 
     @staticmethod
     def send_to_all_users(notification_type: str, title: str,
-                          message: str) -> List['Notification']:
-        """Send notification to all users."""
-        db = get_db()
+                          message: str) -> int:
+        """Send notification to all users with a single INSERT ... SELECT.
 
-        # Get all users with role 'user'
-        users = db.execute("SELECT id FROM users WHERE role = 'user'").fetchall()
+        Returns:
+            Number of notifications created.
+        """
+        db = get_db()
+        date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
-        notifications = []
-        for user in users:
-            notif = Notification.create(user['id'], notification_type, title, message)
-            notifications.append(notif)
+        # One row per user with role 'user'
+        rows = db.execute(f'''
+            INSERT INTO notifications (id, user_id, type, title, message, date, is_read)
+            SELECT {_SQL_UUID4}, id, ?, ?, ?, ?, 0
+            FROM users WHERE role = 'user'
+            RETURNING user_id
+        ''', (notification_type, title, message, date)).fetchall()
+        db.commit()
 
-        return notifications
+        UnreadCounts.increment_many([row['user_id'] for row in rows],
+                                    UnreadCounts.NOTIFICATIONS)
+        return len(rows)
 
     @staticmethod
     def send_to_specific_users(user_ids: List[str], notification_type: str,
-                               title: str, message: str) -> List['Notification']:
-        """Send notification to specific users."""
-        notifications = []
-        for user_id in user_ids:
-            notif = Notification.create(user_id, notification_type, title, message)
-            notifications.append(notif)
-
-        return notifications
+                               title: str, message: str) -> int:
+        """Send notification to specific users with one executemany.
+
+        Returns:
+            Number of notifications created.
+        """
+        if not title or not message or not user_ids:
+            return 0
+
+        db = get_db()
+        date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        db.executemany('''
+            INSERT INTO notifications (id, user_id, type, title, message, date, is_read)
+            VALUES (?, ?, ?, ?, ?, ?, 0)
+        ''', [(str(uuid.uuid4()), user_id, notification_type, title, message, date)
+              for user_id in user_ids])
+        db.commit()
+
+        UnreadCounts.increment_many(user_ids, UnreadCounts.NOTIFICATIONS)
+        return len(user_ids)
 
     def to_dict(self) -> dict:
         """Convert notification to dictionary."""
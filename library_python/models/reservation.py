@@ -8,9 +8,20 @@ automatically notifies users in the queue order (FIFO).
 from datetime import datetime, timedelta
 from typing import Optional, List, Tuple
 import uuid
-from models.database import get_db
+from models.database import forget_cached, get_db, request_cached
 from models.book import Book
 
+# Renumbers one book's waiting reservations 1..n in a single statement,
+# keeping their order (ROW_NUMBER() window + UPDATE ... FROM)
+_REORDER_QUEUE_SQL = '''
+    UPDATE reservations SET queue_position = ranked.position
+    FROM (
+        SELECT id, ROW_NUMBER() OVER (ORDER BY queue_position) AS position
+        FROM reservations WHERE book_id = ? AND status = 'waiting'
+    ) AS ranked
+    WHERE reservations.id = ranked.id
+'''
+
 
 class Reservation:
     """Represents a book reservation in the queue.
@@ -39,6 +50,9 @@ class Reservation:
         self.notified_date = notified_date
         self.hold_until = hold_until
         self.queue_position = queue_position
+        # Filled by Reservation.preload_related() to avoid per-row lookups
+        self._book: Optional[Book] = None
+        self._user = None
     
     @staticmethod
     def create(user_id: str, book_id: str) -> Tuple[Optional['Reservation'], str]:
@@ -110,6 +124,7 @@ class Reservation:
             return None, "Failed to create reservation"
     
     @staticmethod
+    @request_cached('Reservation')
     def get_by_id(reservation_id: str) -> Optional['Reservation']:
         """Get reservation by ID."""
         db = get_db()
@@ -213,6 +228,24 @@ class Reservation:
         
         return count > 0
     
+    @staticmethod
+    def reorder_queues(book_ids, commit: bool = True) -> None:
+        """Close gaps in the waiting queues of some books.
+        
+        Each queue is renumbered 1..n by one UPDATE, run for all books
+        through a single executemany().
+        
+        Args:
+            book_ids: Iterable of book IDs whose queues changed.
+            commit: Commit immediately; pass False to let the caller
+                commit this together with other writes.
+        """
+        db = get_db()
+        db.executemany(_REORDER_QUEUE_SQL, [(book_id,) for book_id in book_ids])
+        if commit:
+            db.commit()
+        forget_cached('Reservation')
+    
     @staticmethod
     def get_all() -> List['Reservation']:
         """Get all reservations.
@@ -228,6 +261,20 @@ class Reservation:
         
         return [Reservation(**dict(row)) for row in rows]
     
+    @staticmethod
+    def preload_related(reservations: List['Reservation']) -> None:
+        """Load the books and users of many reservations with one query each.
+        
+        Args:
+            reservations: Reservations whose get_book()/get_user() will be used.
+        """
+        from models.user import User
+        books = Book.get_by_ids(r.book_id for r in reservations)
+        users = User.get_by_ids(r.user_id for r in reservations)
+        for reservation in reservations:
+            reservation._book = books.get(reservation.book_id)
+            reservation._user = users.get(reservation.user_id)
+    
     @staticmethod
     def get_ready_reservations_for_book(book_id: str) -> List['Reservation']:
         """Get all reservations marked as 'ready' for a specific book."""
@@ -327,6 +374,7 @@ class Reservation:
                 SET queue_position = queue_position - 1
                 WHERE book_id = ? AND status = 'waiting' AND queue_position > ?
             ''', (self.book_id, self.queue_position))
+            forget_cached('Reservation')
         
         db.commit()
         
@@ -370,12 +418,16 @@ class Reservation:
     
     def get_book(self) -> Optional[Book]:
         """Get the book associated with this reservation."""
-        return Book.get_by_id(self.book_id)
+        if self._book is None:
+            self._book = Book.get_by_id(self.book_id)
+        return self._book
     
     def get_user(self):
         """Get the user associated with this reservation."""
-        from models.user import User
-        return User.get_by_id(self.user_id)
+        if self._user is None:
+            from models.user import User
+            self._user = User.get_by_id(self.user_id)
+        return self._user
     
     def get_queue_position(self) -> int:
         """Get current position in the queue."""
@@ -7,7 +7,7 @@ import uuid
 from datetime import datetime
 from typing import List, Optional, Tuple
 
-from models.database import get_db
+from models.database import forget_cached, get_db, request_cached
 
 
 class Review:
@@ -96,6 +96,7 @@ class Review:
             return None, "Failed to submit review"
     
     @staticmethod
+    @request_cached('Review')
     def get_by_id(review_id):
         """Get review by ID"""
         db = get_db()
@@ -105,8 +106,8 @@ class Review:
         return None
     
     @staticmethod
-    def get_by_book(book_id, limit=None):
-        """Get all reviews for a book"""
+    def get_by_book(book_id, limit=None, offset=0):
+        """Get all reviews for a book (newest first, optionally paginated)"""
         db = get_db()
         
         if limit:
@@ -114,8 +115,8 @@ class Review:
                 SELECT * FROM reviews 
                 WHERE book_id = ? 
                 ORDER BY date DESC 
-                LIMIT ?
-            ''', (book_id, limit)).fetchall()
+                LIMIT ? OFFSET ?
+            ''', (book_id, limit, offset)).fetchall()
         else:
             rows = db.execute('''
                 SELECT * FROM reviews 
@@ -125,6 +126,33 @@ class Review:
         
         return [Review(**dict(row)) for row in rows]
     
+    @staticmethod
+    def get_rating_stats(book_id: str) -> dict:
+        """Get average, count and star distribution of a book's reviews.
+
+        Args:
+            book_id: Book ID.
+
+        Returns:
+            Dictionary with 'average', 'count' and 'distribution'
+            (star value -> number of reviews).
+        """
+        db = get_db()
+        row = db.execute('''
+            SELECT AVG(rating) as average, COUNT(*) as count,
+                   SUM(rating = 1) as r1, SUM(rating = 2) as r2,
+                   SUM(rating = 3) as r3, SUM(rating = 4) as r4,
+                   SUM(rating = 5) as r5
+            FROM reviews
+            WHERE book_id = ?
+        ''', (book_id,)).fetchone()
+
+        return {
+            'average': round(row['average'], 1) if row['count'] else 0,
+            'count': row['count'],
+            'distribution': {i: row[f'r{i}'] or 0 for i in range(1, 6)}
+        }
+    
     @staticmethod
     def get_by_user(user_id):
         """Get all reviews by a user"""
@@ -137,6 +165,19 @@ class Review:
         
         return [Review(**dict(row)) for row in rows]
     
+    @staticmethod
+    def get_by_user_and_book(user_id, book_id):
+        """Get a user's latest review of a book, or None (idx_reviews_user_book)"""
+        db = get_db()
+        row = db.execute('''
+            SELECT * FROM reviews 
+            WHERE user_id = ? AND book_id = ?
+            ORDER BY date DESC
+            LIMIT 1
+        ''', (user_id, book_id)).fetchone()
+        
+        return Review(**dict(row)) if row else None
+    
     @staticmethod
     def user_has_reviewed(user_id, book_id):
         """Check if user has already reviewed a book"""
@@ -151,23 +192,8 @@ class Review:
     @staticmethod
     def update_book_rating(book_id):
         """Recalculate and update book's average rating"""
-        db = get_db()
-        
-        # Calculate average rating
-        row = db.execute('''
-            SELECT AVG(rating) as avg_rating, COUNT(*) as count
-            FROM reviews 
-            WHERE book_id = ?
-        ''', (book_id,)).fetchone()
-        
-        if row and row['count'] > 0:
-            avg_rating = round(row['avg_rating'], 1)
-            db.execute('''
-                UPDATE books 
-                SET rating = ? 
-                WHERE id = ?
-            ''', (avg_rating, book_id))
-            db.commit()
+        from models.book import Book
+        Book.bulk_refresh_ratings([book_id])
     
     @staticmethod
     def delete(review_id):
@@ -183,6 +209,7 @@ class Review:
         
         db.execute('DELETE FROM reviews WHERE id = ?', (review_id,))
         db.commit()
+        forget_cached('Review', review_id)
         
         # Update book rating
         Review.update_book_rating(book_id)
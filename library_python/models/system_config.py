@@ -43,11 +43,13 @@ class SystemConfig:
         return SystemConfig.DEFAULT_CONFIG.copy()
 
     @staticmethod
-    def update(config_data: Dict[str, Any]) -> bool:
+    def update(config_data: Dict[str, Any], commit: bool = True) -> bool:
         """Update system configuration.
 
         Args:
             config_data: Dictionary containing configuration settings.
+            commit: Commit immediately; pass False to let the caller
+                commit this together with other writes.
 
         Returns:
             True if update was successful.
@@ -63,5 +65,6 @@ class SystemConfig:
         else:
             db.execute('INSERT INTO system_config (id, config_data) VALUES (1, ?)', (config_json,))
 
-        db.commit()
+        if commit:
+            db.commit()
         return True
@@ -5,7 +5,7 @@ all system activities, user actions, and errors.
 """
 import uuid
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 
 from models.database import get_db
 
@@ -19,7 +19,7 @@ class SystemLog:
 
     @staticmethod
     def add(action: str, details: str, log_type: str = 'info',
-            user_id: Optional[str] = None) -> str:
+            user_id: Optional[str] = None, commit: bool = True) -> str:
         """Add a new system log entry.
 
         Args:
@@ -27,6 +27,8 @@ class SystemLog:
             details: Detailed description of the action.
             log_type: Log level ('info', 'warning', 'error', 'admin').
             user_id: ID of user who performed the action (optional).
+            commit: Commit immediately; pass False to let the caller
+                commit this together with other writes.
 
         Returns:
             The ID of the created log entry.
@@ -39,7 +41,8 @@ class SystemLog:
             INSERT INTO system_logs (id, timestamp, action, details, log_type, user_id)
             VALUES (?, ?, ?, ?, ?, ?)
         ''', (log_id, timestamp, action, details, log_type, user_id))
-        db.commit()
+        if commit:
+            db.commit()
         return log_id
 
     @staticmethod
@@ -61,6 +64,28 @@ class SystemLog:
 
         return [dict(log) for log in logs]
 
+    @staticmethod
+    def iter_recent(limit: int = 50) -> Iterator[Dict[str, Any]]:
+        """Yield recent system logs one at a time from the DB cursor.
+
+        Unlike get_recent(), rows are never collected into a list, so
+        large exports use constant memory.
+
+        Args:
+            limit: Maximum number of logs to yield.
+
+        Yields:
+            Log entries as dictionaries, newest first.
+        """
+        db = get_db()
+        cursor = db.execute('''
+            SELECT * FROM system_logs 
+            ORDER BY timestamp DESC 
+            LIMIT ?
+        ''', (limit,))
+        for log in cursor:
+            yield dict(log)
+
     @staticmethod
     def clear_old_logs(days: int = 30) -> bool:
         """Clear logs older than specified days.
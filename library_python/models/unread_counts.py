@@ -0,0 +1,159 @@
+"""Unread counters for the navigation bar.
+
+This module fetches the unread chat message and notification counts
+shown on every authenticated page in a single database round-trip,
+and caches them in Redis between changes and on ``g`` for the rest of
+the request.
+"""
+from typing import Dict, List, Tuple
+
+from flask import g
+
+from config.config import Config
+from extensions import redis_client
+from models.database import get_db
+
+
+class UnreadCounts:
+    """Combined unread message / notification counts for a user.
+
+    The pair is cached in the ``unread:{user_id}`` Redis hash (fields
+    ``m`` and ``n``). New messages/notifications increment the cached
+    counters and reads decrement them by the number of rows that actually
+    flipped, so the hash stays warm instead of being recomputed.
+
+    This class provides static methods only. No instances are created.
+    """
+
+    MESSAGES = 'm'
+    NOTIFICATIONS = 'n'
+
+    # Adjusts a cached counter atomically, never going below zero and
+    # never creating the hash (a missing hash means "not cached").
+    _ADJUST_SCRIPT = redis_client.register_script('''
+        if redis.call('EXISTS', KEYS[1]) == 0 then return nil end
+        local value = redis.call('HINCRBY', KEYS[1], ARGV[1], ARGV[2])
+        if value < 0 then
+            redis.call('HSET', KEYS[1], ARGV[1], 0)
+            return 0
+        end
+        return value
+    ''') if redis_client is not None else None
+
+    @staticmethod
+    def _key(user_id: str) -> str:
+        return f'unread:{user_id}'
+
+    @staticmethod
+    def _request_cache() -> Dict[str, Tuple[int, int]]:
+        return g.setdefault('_unread_counts', {})
+
+    @staticmethod
+    def get_for_user(user_id: str) -> Tuple[int, int]:
+        """Get unread chat message and notification counts for a user.
+
+        Served from Redis when cached, otherwise from the database.
+
+        Args:
+            user_id: User ID.
+
+        Returns:
+            Tuple of (unread_messages, unread_notifications).
+        """
+        request_cache = UnreadCounts._request_cache()
+        if user_id in request_cache:
+            return request_cache[user_id]
+
+        if redis_client is not None:
+            cached = redis_client.hgetall(UnreadCounts._key(user_id))
+            if UnreadCounts.MESSAGES in cached and UnreadCounts.NOTIFICATIONS in cached:
+                counts = (int(cached[UnreadCounts.MESSAGES]),
+                          int(cached[UnreadCounts.NOTIFICATIONS]))
+                request_cache[user_id] = counts
+                return counts
+
+        db = get_db()
+        row = db.execute('''
+            SELECT
+                (SELECT COUNT(*) FROM chat_messages
+                 WHERE receiver_id = ? AND is_read = 0) as messages,
+                (SELECT COUNT(*) FROM notifications
+                 WHERE user_id = ? AND is_read = 0) as notifications
+        ''', (user_id, user_id)).fetchone()
+        counts = (row['messages'], row['notifications'])
+
+        if redis_client is not None:
+            key = UnreadCounts._key(user_id)
+            pipe = redis_client.pipeline()
+            pipe.hset(key, mapping={
+                UnreadCounts.MESSAGES: counts[0],
+                UnreadCounts.NOTIFICATIONS: counts[1]
+            })
+            pipe.expire(key, Config.UNREAD_CACHE_TTL_SECONDS)
+            pipe.execute()
+
+        request_cache[user_id] = counts
+        return counts
+
+    @staticmethod
+    def get_messages(user_id: str) -> int:
+        """Get the unread chat message count for a user."""
+        return UnreadCounts.get_for_user(user_id)[0]
+
+    @staticmethod
+    def get_notifications(user_id: str) -> int:
+        """Get the unread notification count for a user."""
+        return UnreadCounts.get_for_user(user_id)[1]
+
+    @staticmethod
+    def increment(user_id: str, field: str, amount: int = 1) -> None:
+        """Bump a cached counter if the user's counts are cached.
+
+        Args:
+            user_id: User ID.
+            field: UnreadCounts.MESSAGES or UnreadCounts.NOTIFICATIONS.
+            amount: Value to add.
+        """
+        UnreadCounts._request_cache().pop(user_id, None)
+        if UnreadCounts._ADJUST_SCRIPT is None or not amount:
+            return
+        UnreadCounts._ADJUST_SCRIPT(keys=[UnreadCounts._key(user_id)],
+                                    args=[field, amount])
+
+    @staticmethod
+    def increment_many(user_ids: List[str], field: str, amount: int = 1) -> None:
+        """Bump a cached counter for many users in one Redis round-trip.
+
+        Args:
+            user_ids: User IDs.
+            field: UnreadCounts.MESSAGES or UnreadCounts.NOTIFICATIONS.
+            amount: Value to add for each user.
+        """
+        request_cache = UnreadCounts._request_cache()
+        for user_id in user_ids:
+            request_cache.pop(user_id, None)
+        if UnreadCounts._ADJUST_SCRIPT is None or not amount or not user_ids:
+            return
+        pipe = redis_client.pipeline()
+        for user_id in user_ids:
+            UnreadCounts._ADJUST_SCRIPT(keys=[UnreadCounts._key(user_id)],
+                                        args=[field, amount], client=pipe)
+        pipe.execute()
+
+    @staticmethod
+    def decrement(user_id: str, field: str, amount: int = 1) -> None:
+        """Lower a cached counter, clamped at zero.
+
+        Args:
+            user_id: User ID.
+            field: UnreadCounts.MESSAGES or UnreadCounts.NOTIFICATIONS.
+            amount: Value to subtract.
+        """
+        UnreadCounts.increment(user_id, field, -amount)
+
+    @staticmethod
+    def invalidate(user_id: str) -> None:
+        """Drop cached counts so the next read recomputes them."""
+        UnreadCounts._request_cache().pop(user_id, None)
+        if redis_client is not None:
+            redis_client.delete(UnreadCounts._key(user_id))
@@ -9,10 +9,30 @@ from typing import Optional, List, Dict, Any, Tuple
 from models.book import Book
 from werkzeug.security import check_password_hash, generate_password_hash
 
-from models.database import get_db
+from config.config import Config
+from extensions import redis_client
+from models.database import chunked, forget_cached, get_db, request_cached
 from models.guest import Guest  # Import chuẩn, đã loại bỏ block try/except dự phòng
 
+# Per-user data versions used to validate session snapshots when Redis is
+# not configured; the epoch keeps snapshots from a previous process invalid
+_local_versions: Dict[str, int] = {}
+_VERSION_EPOCH = uuid.uuid4().hex[:8]
+
+# Fields kept in the session snapshot: what per-request code (templates,
+# role checks, the fines banner) reads. The session may be a client-side
+# cookie, so contact details and the unbounded favorites list stay out.
+_SNAPSHOT_FIELDS = ('id', 'name', 'role', 'fines', 'is_locked')
+# Profile fields a snapshot-built user loads from the database on first use.
+# The password hash is deliberately absent: get_cached() omits it when Redis
+# is on, so code that needs it must load the user with User.get_by_id()
+_LAZY_FIELDS = ('email', 'favorites', 'phone', 'birthday', 'member_since',
+                'violations')
+
 class User:
+    # Counterpart of Guest.is_authenticated (polymorphic login check)
+    is_authenticated = True
+
     @staticmethod
     def get_users_with_debt():
         """Get list of users who have outstanding fines."""
@@ -46,15 +66,151 @@ class User:
         self.password = kwargs.get('password')
         self.violations = int(kwargs.get('violations', 0))
 
+    def __getattr__(self, name: str) -> Any:
+        # Only reached for attributes missing from the instance, i.e. the
+        # profile fields a session snapshot leaves out (see from_snapshot)
+        if name not in _LAZY_FIELDS or 'id' not in self.__dict__:
+            raise AttributeError(name)
+        full = User.get_cached(self.id)
+        if full is None:
+            raise AttributeError(name)
+        for field in _LAZY_FIELDS:
+            self.__dict__.setdefault(field, getattr(full, field))
+        return self.__dict__[name]
+
     @staticmethod
     def get_user_or_guest(user_id: Optional[str]) -> 'User':
         """Get User object or Guest object."""
         if not user_id:
             return Guest()
-        user = User.get_by_id(user_id)
+        user = User.get_cached(user_id)
         return user if user else Guest()
 
     @staticmethod
+    def get_cached(user_id: str) -> Optional['User']:
+        """Get User/Staff/Admin by ID through the Redis user cache.
+
+        The user row (without the password hash) is cached under
+        ``user:{id}`` for USER_CACHE_TTL_SECONDS. Falls back to a plain
+        DB lookup when Redis is not configured.
+        """
+        if redis_client is None:
+            return User.get_by_id(user_id)
+
+        key = f'user:{user_id}'
+        raw = redis_client.get(key)
+        if raw:
+            return get_user_by_role(json.loads(raw))
+
+        db = get_db()
+        row = db.execute(
+            'SELECT * FROM users WHERE id = ?',
+            (user_id,)
+        ).fetchone()
+        if not row:
+            return None
+        data = dict(row)
+        data.pop('password', None)
+        redis_client.setex(key, Config.USER_CACHE_TTL_SECONDS, json.dumps(data))
+        return get_user_by_role(data)
+
+    @staticmethod
+    def invalidate_cache(user_id: str) -> None:
+        """Drop the cached row of a user after it has been modified.
+
+        Also bumps the user's data version so session snapshots taken
+        before the change are reloaded on the next request.
+        """
+        forget_cached('User', user_id)
+        if redis_client is not None:
+            pipe = redis_client.pipeline()
+            pipe.delete(f'user:{user_id}')
+            pipe.incr(f'user_ver:{user_id}')
+            pipe.execute()
+        else:
+            _local_versions[user_id] = _local_versions.get(user_id, 0) + 1
+
+    @staticmethod
+    def get_version(user_id: str) -> str:
+        """Get the current data version token of a user."""
+        if redis_client is not None:
+            return redis_client.get(f'user_ver:{user_id}') or '0'
+        return f'{_VERSION_EPOCH}:{_local_versions.get(user_id, 0)}'
+
+    @staticmethod
+    def load_for_session(sess) -> 'User':
+        """Get the logged-in user, preferring the snapshot in the session.
+
+        The snapshot written at login (or on the last reload) is trusted
+        while its version matches get_version(); otherwise the user is
+        reloaded and the snapshot refreshed.
+
+        Args:
+            sess: The Flask session containing 'user_id'.
+
+        Returns:
+            User/Staff/Admin instance, or Guest if the user no longer exists.
+        """
+        user_id = sess['user_id']
+        version = User.get_version(user_id)
+        snapshot = sess.get('user_snapshot')
+        if (snapshot and snapshot.get('id') == user_id
+                and sess.get('user_ver') == version):
+            return User.from_snapshot(snapshot)
+
+        user = User.get_cached(user_id)
+        if not user:
+            return Guest()
+        User.store_snapshot(sess, user, version)
+        return user
+
+    @staticmethod
+    def store_snapshot(sess, user: 'User', version: Optional[str] = None) -> None:
+        """Save a user's snapshot (see snapshot()) into the session.
+
+        Args:
+            sess: The Flask session.
+            user: User to snapshot.
+            version: Version token read before the user was loaded
+                (defaults to the current one).
+        """
+        sess['user_snapshot'] = user.snapshot()
+        sess['user_ver'] = version if version is not None else User.get_version(user.id)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get the small, fixed-size set of fields kept in the session."""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'role': self.role,
+            'fines': self.fines,
+            'is_locked': int(self.is_locked)
+        }
+
+    @staticmethod
+    def from_snapshot(data: Dict[str, Any]) -> 'User':
+        """Rebuild a User/Staff/Admin from snapshot() output.
+
+        Only the snapshot fields are set; the rest of the profile is
+        loaded on first access.
+        """
+        role = data.get('role', 'user')
+        if role == 'admin':
+            cls = _get_admin_class()
+        elif role == 'staff':
+            cls = _get_staff_class()
+        else:
+            cls = User
+        user = cls.__new__(cls)
+        user.id = data['id']
+        user.name = data['name']
+        user.role = role
+        user.fines = float(data['fines'] or 0.0)
+        user.is_locked = bool(data['is_locked'])
+        return user
+
+    @staticmethod
+    @request_cached('User')
     def get_by_id(user_id: str) -> Optional['User']:
         """Factory Method: Get User, Staff, or Admin instance by ID."""
         db = get_db()
@@ -66,6 +222,19 @@ class User:
             return None
         return get_user_by_role(dict(row))
 
+    @staticmethod
+    def get_by_ids(user_ids) -> Dict[str, 'User']:
+        """Get several users (as User/Staff/Admin), one query per 500 IDs."""
+        db = get_db()
+        users = {}
+        for chunk in chunked(user_ids):
+            rows = db.execute(
+                f"SELECT * FROM users WHERE id IN ({','.join('?' * len(chunk))})",
+                chunk
+            ).fetchall()
+            users.update((row['id'], get_user_by_role(dict(row))) for row in rows)
+        return users
+
     @staticmethod
     def get_by_email(email: str) -> Optional['User']:
         """Get user by email and return correct class (User/Staff/Admin)."""
@@ -128,6 +297,7 @@ class User:
                 (self.name, self.phone, self.birthday, self.id)
             )
             db.commit()
+            User.invalidate_cache(self.id)
             return True, "Profile updated successfully"
         except Exception as e:
             return False, f"Failed to update profile: {str(e)}"
@@ -170,6 +340,7 @@ class User:
                 self.unlock()
 
             db.commit()
+            User.invalidate_cache(self.id)
             return True, f"Paid {pay_amount:,.0f} VND. Remaining: {self.fines:,.0f} VND"
         except Exception as e:
             db.rollback()
@@ -181,6 +352,7 @@ class User:
         db = get_db()
         db.execute('UPDATE users SET is_locked = 1 WHERE id = ?', (self.id,))
         db.commit()
+        User.invalidate_cache(self.id)
 
     def unlock(self) -> None:
         """Unlock user account."""
@@ -188,6 +360,7 @@ class User:
         db = get_db()
         db.execute('UPDATE users SET is_locked = 0 WHERE id = ?', (self.id,))
         db.commit()
+        User.invalidate_cache(self.id)
 
     def reset_password(self, new_password: str) -> Tuple[bool, str]:
         """Reset user password."""
@@ -205,22 +378,37 @@ class User:
         except Exception as e:
             return False, f"Password reset failed: {str(e)}"
 
-    def add_fine(self, amount: float) -> None:
-        """Add fine amount to user account."""
+    def add_fine(self, amount: float, commit: bool = True) -> None:
+        """Add fine amount to user account.
+
+        Args:
+            amount: Amount to add.
+            commit: Commit immediately; pass False to let the caller
+                commit this together with other writes.
+        """
         self.fines += float(amount)
         db = get_db()
         db.execute('UPDATE users SET fines = ? WHERE id = ?', (self.fines, self.id))
-        db.commit()
+        if commit:
+            db.commit()
+        User.invalidate_cache(self.id)
 
-    def add_violation(self) -> None:
-        """Increment violation count for user."""
+    def add_violation(self, commit: bool = True) -> None:
+        """Increment violation count for user.
+
+        Args:
+            commit: Commit immediately; pass False to let the caller
+                commit this together with other writes.
+        """
         self.violations += 1
         db = get_db()
         db.execute(
             'UPDATE users SET violations = ? WHERE id = ?',
             (self.violations, self.id)
         )
-        db.commit()
+        if commit:
+            db.commit()
+        User.invalidate_cache(self.id)
 
     def can_manage_borrows(self) -> bool:
         """Check if user can manage borrows (staff or admin)."""
@@ -235,10 +423,9 @@ class User:
         return self.role in ['staff', 'admin']
     
     def get_favorite_books(self) -> List['Book']:
-        """Get list of favorite books."""
-        from models.book import Book
-        return [Book.get_by_id(bid) for bid in self.favorites
-                if Book.get_by_id(bid)]
+        """Get list of favorite books, in the order they were added."""
+        books = Book.get_by_ids(self.favorites)
+        return [books[bid] for bid in self.favorites if bid in books]
 
     def add_favorite(self, book_id: str) -> bool:
         """Add book to favorites."""
@@ -264,6 +451,7 @@ class User:
             (json.dumps(self.favorites), self.id)
         )
         db.commit()
+        User.invalidate_cache(self.id)
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert user to dictionary."""
@@ -331,15 +519,11 @@ class User:
             else:
                 status['can_reserve'] = True
 
-        reviews = Review.get_by_book(book_id)
-        status['can_review'] = not any(r.user_id == self.id for r in reviews)
-
-        if not status['can_review']:
-            my_reviews = [r for r in reviews if r.user_id == self.id]
-            # Convert object to dict for template if needed, or keep object
-            # Original code expected dict from 'get_book_reviews_with_details'
-            # Here we provide the object, template should handle 'r.comment' etc.
-            status['user_review'] = my_reviews[0].to_dict() if my_reviews else None
+        # Only this user's review is needed, not every review of the book
+        my_review = Review.get_by_user_and_book(self.id, book_id)
+        status['can_review'] = my_review is None
+        if my_review is not None:
+            status['user_review'] = my_review.to_dict()
 
         return status
 
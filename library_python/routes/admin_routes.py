@@ -6,8 +6,12 @@ log management, and administrative notifications.
 import csv
 from io import StringIO
 
-from flask import Blueprint, flash, make_response, redirect, render_template, request, session, url_for
+from flask import (
+    Blueprint, Response, flash, redirect, render_template, request, session,
+    stream_with_context, url_for
+)
 
+from config.config import Config
 from models.admin import Admin
 from models.system_config import SystemConfig
 from models.system_log import SystemLog
@@ -166,28 +170,29 @@ def export_logs():
     Returns:
         CSV file download response containing system logs.
     """
-    logs = SystemLog.get_recent(1000)
-    
-    # Create CSV in memory
-    si = StringIO()
-    writer = csv.writer(si)
-    
-    # Write header
-    writer.writerow(['Timestamp', 'Action', 'Details', 'Type', 'User ID'])
-    
-    # Write log data
-    for log in logs:
-        writer.writerow([
-            log['timestamp'],
-            log['action'],
-            log['details'],
-            log['log_type'],
-            log.get('user_id', '')
-        ])
-    
-    # Create response with CSV data
-    output = make_response(si.getvalue())
-    output.headers["Content-Disposition"] = "attachment; filename=system_logs.csv"
-    output.headers["Content-type"] = "text/csv"
-    
-    return output
\ No newline at end of file
+    def generate():
+        # Rows are streamed from the DB cursor as they are written,
+        # so memory stays flat regardless of the export size
+        line = StringIO()
+        writer = csv.writer(line)
+        
+        writer.writerow(['Timestamp', 'Action', 'Details', 'Type', 'User ID'])
+        yield line.getvalue()
+        
+        for log in SystemLog.iter_recent(Config.LOG_EXPORT_LIMIT):
+            line.seek(0)
+            line.truncate()
+            writer.writerow([
+                log['timestamp'],
+                log['action'],
+                log['details'],
+                log['log_type'],
+                log.get('user_id', '')
+            ])
+            yield line.getvalue()
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/csv',
+        headers={'Content-Disposition': 'attachment; filename=system_logs.csv'}
+    )
\ No newline at end of file
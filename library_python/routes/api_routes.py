@@ -28,15 +28,17 @@ def get_books():
     
     Query params:
         q: Search query.
-        searchBy: Field to search (title, author, category).
+        searchBy: Field to search (title, author, category, any).
+        exact: '1' to match the whole field instead of a substring.
     
     Returns:
         JSON response with book list.
     """
     query = request.args.get('q', '')
     search_by = request.args.get('searchBy', 'title')
+    exact = request.args.get('exact') == '1'
     
-    books = Book.search(query, search_by)
+    books = Book.search(query, search_by, exact=exact)
     
     return jsonify({
         'success': True,
@@ -116,8 +118,9 @@ def cancel_borrow(book_id: str):
         JSON response with success status and message.
     """
     # Find pending borrow for this book
-    borrows = Borrow.get_user_borrows(session['user_id'], status='pending_pickup')
-    target_borrow = next((b for b in borrows if b.book_id == book_id), None)
+    target_borrow = Borrow.get_by_user_and_book(
+        session['user_id'], book_id, 'pending_pickup'
+    )
     
     if target_borrow:
         success, message = target_borrow.cancel()
@@ -171,10 +174,8 @@ def renew_book(book_id: str):
     days = data.get('days', 7)
     
     # Find active borrow for this book
-    borrows = Borrow.get_active_borrows(session['user_id'])
-    target_borrow = next(
-        (b for b in borrows if b.book_id == book_id and b.status == 'borrowed'),
-        None
+    target_borrow = Borrow.get_by_user_and_book(
+        session['user_id'], book_id, 'borrowed'
     )
     
     if target_borrow:
@@ -295,19 +296,19 @@ def send_notification():
     
     try:
         if target == 'all':
-            notifications = Notification.send_to_all_users(notif_type, title, message)
+            count = Notification.send_to_all_users(notif_type, title, message)
             return jsonify({
                 'success': True,
-                'message': f'Sent to {len(notifications)} users'
+                'message': f'Sent to {count} users'
             })
         
         elif target == 'specific' and user_ids:
-            notifications = Notification.send_to_specific_users(
+            count = Notification.send_to_specific_users(
                 user_ids, notif_type, title, message
             )
             return jsonify({
                 'success': True,
-                'message': f'Sent to {len(notifications)} users'
+                'message': f'Sent to {count} users'
             })
         
         return jsonify({
@@ -41,7 +41,7 @@ def login():
         if user:
             # Create user session
             session['user_id'] = user.id
-            session['user_role'] = user.role
+            User.store_snapshot(session, user)
             session.permanent = remember
             
             flash(f'Welcome back, {user.name}!', 'success')
@@ -4,6 +4,8 @@ This module handles public-facing pages like home, search, and book details.
 """
 from flask import Blueprint, flash, g, redirect, render_template, request, url_for
 
+from config.config import Config
+from extensions import cache
 from models.book import Book
 from models.borrow import Borrow
 from models.review import Review
@@ -12,6 +14,20 @@ from models.review import Review
 main_bp = Blueprint('main', __name__)
 
 
+@cache.cached(timeout=Config.HOME_CACHE_TTL_SECONDS, key_prefix='home_books')
+def get_home_books() -> tuple:
+    """Get the home page book lists, cached for a short TTL.
+    
+    Returns:
+        Tuple of (new_arrivals, most_borrowed, top_rated) book lists.
+    """
+    return (
+        Book.get_new_arrivals(limit=4),
+        Book.get_most_borrowed(limit=4),
+        Book.get_top_rated(limit=4)
+    )
+
+
 @main_bp.route('/')
 def home():
     """Display the home page with featured books.
@@ -19,11 +35,12 @@ def home():
     Returns:
         Rendered home page template.
     """
+    new_arrivals, most_borrowed, top_rated = get_home_books()
     return render_template(
         'pages/home.html',
-        new_arrivals=Book.get_new_arrivals(limit=4),
-        most_borrowed=Book.get_most_borrowed(limit=4),
-        top_rated=Book.get_top_rated(limit=4)
+        new_arrivals=new_arrivals,
+        most_borrowed=most_borrowed,
+        top_rated=top_rated
     )
 
 
@@ -33,7 +50,7 @@ def search():
     
     Query parameters:
         q: Search query string
-        searchBy: Field to search (title, author, category)
+        searchBy: Field to search (title, author, category, any)
         sort: Sort order (title, author, year, rating, popular, new)
         category: Filter by category
     
@@ -74,27 +91,14 @@ def book_detail(book_id: str):
         flash('Book not found', 'error')
         return redirect(url_for('main.search'))
 
-    # Get reviews and calculate statistics
-    review_objs = Review.get_by_book(book_id)
+    # Rating statistics are aggregated in SQL; only one page of reviews is loaded
+    rating_stats = Review.get_rating_stats(book_id)
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = Config.REVIEWS_PER_PAGE
+    review_objs = Review.get_by_book(book_id, limit=per_page,
+                                     offset=(page - 1) * per_page)
     reviews = [r.to_dict() for r in review_objs]
-    
-    # Calculate rating statistics
-    if review_objs:
-        avg_rating = round(sum(r.rating for r in review_objs) / len(review_objs), 1)
-        distribution = {i: 0 for i in range(1, 6)}
-        for r in review_objs:
-            distribution[r.rating] += 1
-        rating_stats = {
-            'average': avg_rating,
-            'count': len(review_objs),
-            'distribution': distribution
-        }
-    else:
-        rating_stats = {
-            'average': 0,
-            'count': 0,
-            'distribution': {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
-        }
+    has_more_reviews = page * per_page < rating_stats['count']
 
     # Default interaction status for guests
     interaction_status = {
@@ -108,7 +112,7 @@ def book_detail(book_id: str):
     }
 
     # Get interaction status for logged-in users
-    if g.user and hasattr(g.user, 'id') and g.user.id:
+    if g.user.is_authenticated:
         interaction_status = g.user.get_book_interaction_status(book_id, book)
 
     return render_template(
@@ -116,6 +120,8 @@ def book_detail(book_id: str):
         book=book,
         reviews=reviews,
         rating_stats=rating_stats,
+        page=page,
+        has_more_reviews=has_more_reviews,
         **interaction_status
     )
 
@@ -26,14 +26,22 @@ def dashboard():
         Rendered staff dashboard template.
     """
     staff = Staff.get_by_id(session['user_id'])
+    pending_borrows = Borrow.get_user_borrows_by_status('pending_pickup')
+    borrowed_books = Borrow.get_user_borrows_by_status('borrowed')
+    overdue_books = Borrow.get_overdue_borrows()
+    all_reservations = Reservation.get_all()
+    
+    # Batch-load the book/user shown on every row instead of one query each
+    Borrow.preload_related(pending_borrows + borrowed_books + overdue_books)
+    Reservation.preload_related(all_reservations)
     
     return render_template(
         'pages/staff/dashboard.html',
-        pending_borrows=Borrow.get_user_borrows_by_status('pending_pickup'),
-        borrowed_books=Borrow.get_user_borrows_by_status('borrowed'),
-        overdue_books=Borrow.get_overdue_borrows(),
+        pending_borrows=pending_borrows,
+        borrowed_books=borrowed_books,
+        overdue_books=overdue_books,
         all_books=Book.get_all(),
-        all_reservations=Reservation.get_all(),
+        all_reservations=all_reservations,
         popular_books=Book.get_most_borrowed(limit=10),
         stats=staff.get_stats(),
         users_with_debt=User.get_users_with_debt()
@@ -24,13 +24,21 @@ def dashboard():
         Rendered dashboard template.
     """
     user = User.get_by_id(session['user_id'])
+    borrowed_books = Borrow.get_user_borrowed_books(user.id)
+    reserved_books = Borrow.get_user_reserved_books(user.id)
+    overdue_books = Borrow.get_user_overdue_books(user.id)
+    upcoming_due = Borrow.get_upcoming_due_books(user.id, days=3)
+    
+    # Fetch the books shown in every list at once, not one query per row
+    Borrow.preload_related(borrowed_books + overdue_books + upcoming_due)
+    Reservation.preload_related(reserved_books)
     
     return render_template(
         'pages/user/dashboard.html',
-        borrowed_books=Borrow.get_user_borrowed_books(user.id),
-        reserved_books=Borrow.get_user_reserved_books(user.id),
-        overdue_books=Borrow.get_user_overdue_books(user.id),
-        upcoming_due=Borrow.get_upcoming_due_books(user.id, days=3)
+        borrowed_books=borrowed_books,
+        reserved_books=reserved_books,
+        overdue_books=overdue_books,
+        upcoming_due=upcoming_due
     )
 
 
@@ -84,6 +92,7 @@ def borrowed_books():
     """
     user = User.get_by_id(session['user_id'])
     borrowed = Borrow.get_user_borrowed_books(user.id)
+    Borrow.preload_related(borrowed)
     
     return render_template(
         'pages/user/borrowed_books.html',
@@ -102,6 +111,7 @@ def reservations():
     """
     user = User.get_by_id(session['user_id'])
     user_reservations = Reservation.get_user_reservations(user.id)
+    Reservation.preload_related(user_reservations)
     
     return render_template(
         'pages/user/reservations.html',
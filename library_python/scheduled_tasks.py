@@ -8,18 +8,42 @@ Tasks include:
 - ✅ FIXED: Notifying users about cancelled pickups
 """
 import logging
+import os
+import signal
+import socket
+from functools import wraps
 from apscheduler.schedulers.background import BackgroundScheduler
 from datetime import datetime, timedelta
+from extensions import redis_client
 from models.borrow import Borrow
 from models.notification import Notification
 from models.system_log import SystemLog
-from models.database import get_db
+from models.database import close_db, get_db
+from utils.concurrency import run_blocking
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Flask app the jobs run against, set by start_scheduler()
+_app = None
 
+
+def scheduled_job(func):
+    """Run a job inside the app context, off the event loop."""
+    @wraps(func)
+    def wrapper():
+        def run():
+            with _app.app_context():
+                try:
+                    return func()
+                finally:
+                    close_db()
+        return run_blocking(run)
+    return wrapper
+
+
+@scheduled_job
 def auto_cancel_expired_pickups():
     """Scheduled task: Cancel pickup requests exceeding 48-hour deadline.
     
@@ -28,32 +52,34 @@ def auto_cancel_expired_pickups():
     Runs every hour to check for expired pending_pickup borrows.
     """
     try:
-        # 1. Get list of expired pickups BEFORE cancelling
-        expired_list = Borrow.get_expired_pickups_details(hours=Config.PENDING_PICKUP_HOURS)
+        # 1. Cancel first; only pickups still pending at that moment are
+        # cancelled, so one approved in the meantime gets no notice
+        cancelled = Borrow.auto_cancel_expired_pickups()
         
-        # 2. Send notifications to affected users
-        for row in expired_list:
-            user_id = row['user_id']
+        # 2. Send notifications to the users whose pickups were cancelled
+        sent_count = 0
+        for row in cancelled:
             book_title = row['title']
+            if not book_title:
+                continue
             
             # Send notification
             Notification.create(
-                user_id=user_id,
+                user_id=row['user_id'],
                 notification_type='alert',
                 title='Reservation Cancelled - Pickup Expired',
                 message=f'Your reservation for "{book_title}" has been automatically cancelled '
                         f'because it was not picked up within {Config.PENDING_PICKUP_HOURS} hours. '
                         f'You can reserve it again if needed.'
             )
-
-        # 3. Then perform the actual cancellation
-        cancelled_count = Borrow.auto_cancel_expired_pickups()
+            sent_count += 1
         
+        cancelled_count = len(cancelled)
         if cancelled_count > 0:
             logger.info(f"Auto-cancelled {cancelled_count} expired pickup requests and notified users.")
             SystemLog.add(
                 'Scheduled Task: Auto-cancel Expired Pickups',
-                f'Successfully cancelled {cancelled_count} expired pickup(s) and sent {cancelled_count} notification(s)',
+                f'Successfully cancelled {cancelled_count} expired pickup(s) and sent {sent_count} notification(s)',
                 'system',
                 None
             )
@@ -67,6 +93,7 @@ def auto_cancel_expired_pickups():
         )
 
 
+@scheduled_job
 def send_due_date_reminders():
     """Scheduled task: Send reminders for books due within 3 days.
     
@@ -121,6 +148,7 @@ def send_due_date_reminders():
         )
 
 
+@scheduled_job
 def send_overdue_notifications():
     """Scheduled task: Send notifications for overdue books.
     
@@ -207,9 +235,46 @@ scheduler.add_job(
 )
 
 
+# Identity of this process for the scheduler leader lock
+LEADER_KEY = 'scheduler:leader'
+LEADER_ID = f'{socket.gethostname()}:{os.getpid()}'
+
+
+def acquire_leader_lock():
+    """Try to become the single process that runs scheduled jobs.
+
+    Without Redis the lock is always granted (single-process deployment).
+    """
+    if redis_client is None:
+        return True
+    return bool(redis_client.set(
+        LEADER_KEY, LEADER_ID, nx=True, ex=Config.SCHEDULER_LOCK_TTL_SECONDS
+    ))
+
+
+def renew_leader_lock():
+    """Heartbeat: extend the leader lease while this process still holds it."""
+    if redis_client.get(LEADER_KEY) == LEADER_ID:
+        redis_client.expire(LEADER_KEY, Config.SCHEDULER_LOCK_TTL_SECONDS)
+
+
 def start_scheduler(app):
-    """Start the background scheduler."""
+    """Start the background scheduler if this process wins the leader lock."""
+    global _app
     if not scheduler.running:
+        if not acquire_leader_lock():
+            logger.info("Scheduler leader lock held by another process; not starting")
+            return
+        if redis_client is not None:
+            scheduler.add_job(
+                func=renew_leader_lock,
+                trigger='interval',
+                seconds=Config.SCHEDULER_LOCK_TTL_SECONDS // 3,
+                id='renew_leader_lock',
+                name='Renew scheduler leader lock',
+                replace_existing=True
+            )
+        _app = app
         scheduler.start()
         logger.info("Scheduled tasks started successfully")
         
@@ -230,4 +295,25 @@ def shutdown_scheduler():
     """Shutdown the scheduler gracefully."""
     if scheduler.running:
         scheduler.shutdown()
-        logger.info("Scheduled tasks shut down")
\ No newline at end of file
+        if redis_client is not None and redis_client.get(LEADER_KEY) == LEADER_ID:
+            redis_client.delete(LEADER_KEY)
+        logger.info("Scheduled tasks shut down")
+
+
+def install_sigterm_handler():
+    """Shut the scheduler down on SIGTERM before the process exits.
+
+    atexit hooks do not run when a worker is terminated by a signal. The
+    previously installed handler (e.g. gunicorn's graceful exit) is
+    chained; otherwise the process exits as SIGTERM normally would.
+    """
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def handle_sigterm(signum, frame):
+        shutdown_scheduler()
+        if callable(previous):
+            previous(signum, frame)
+        else:
+            raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
@@ -0,0 +1,47 @@
+"""Shared fixtures: a throwaway SQLite database seeded by init_db()."""
+import pytest
+from flask import Flask
+
+from config.config import Config
+from extensions import cache
+from models.database import close_db, get_db, init_db
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Minimal app bound to a fresh database file, inside an app context."""
+    monkeypatch.setattr(Config, 'DATABASE_PATH', str(tmp_path / 'library.db'))
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config['CACHE_TYPE'] = 'SimpleCache'
+    cache.init_app(app)
+    with app.app_context():
+        init_db()
+        yield app
+        close_db()
+
+
+@pytest.fixture
+def db(app):
+    return get_db()
+
+
+@pytest.fixture
+def user(app):
+    """The sample member account, with no outstanding fines."""
+    from models.user import User
+    user = User.get_by_email('user@library.com')
+    get_db().execute('UPDATE users SET fines = 0 WHERE id = ?', (user.id,))
+    get_db().commit()
+    User.invalidate_cache(user.id)
+    return User.get_by_id(user.id)
+
+
+@pytest.fixture
+def book(db):
+    """A sample book with copies on the shelf."""
+    from models.book import Book
+    row = db.execute(
+        'SELECT id FROM books WHERE available_copies > 1 ORDER BY id LIMIT 1'
+    ).fetchone()
+    return Book.get_by_id(row['id'])
@@ -0,0 +1,150 @@
+"""Borrow status transitions, inventory/counter consistency and late fees."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from config.config import Config
+from models.book import Book
+from models.borrow import Borrow
+
+
+def available_copies(db, book_id):
+    return db.execute('SELECT available_copies FROM books WHERE id = ?',
+                      (book_id,)).fetchone()[0]
+
+
+def assert_counters_match(db):
+    """borrow_counters must equal a fresh COUNT(*) per status."""
+    actual = dict(db.execute(
+        'SELECT status, COUNT(*) FROM borrows GROUP BY status').fetchall())
+    counters = {key: value for key, value in db.execute(
+        'SELECT key, value FROM borrow_counters').fetchall() if value}
+    assert counters == actual
+
+
+def fresh(borrow):
+    return Borrow.get_by_id(borrow.id)
+
+
+# ---------- Guarded transitions ----------
+
+def test_double_approve_is_rejected(user, book):
+    borrow, _ = Borrow.create(user.id, book.id)
+    stale = fresh(borrow)
+
+    assert borrow.approve_pickup()[0]
+    ok, message = stale.approve_pickup()
+
+    assert not ok
+    assert message == "Only pending pickup requests can be approved"
+    assert fresh(borrow).status == 'borrowed'
+
+
+def test_double_cancel_is_rejected(db, user, book):
+    borrow, _ = Borrow.create(user.id, book.id)
+    stale = fresh(borrow)
+    before = available_copies(db, book.id)
+
+    assert borrow.cancel()[0]
+    ok, _ = stale.cancel()
+
+    assert not ok
+    # The copy is put back once, not twice
+    assert available_copies(db, book.id) == before + 1
+
+
+def test_cancel_after_approve_is_rejected(user, book):
+    borrow, _ = Borrow.create(user.id, book.id)
+    stale = fresh(borrow)
+
+    assert borrow.approve_pickup()[0]
+    ok, _ = stale.cancel()
+
+    assert not ok
+    assert fresh(borrow).status == 'borrowed'
+
+
+def test_double_return_is_rejected(db, user, book):
+    borrow, _ = Borrow.create(user.id, book.id)
+    borrow.approve_pickup()
+    stale = fresh(borrow)
+    before = available_copies(db, book.id)
+
+    assert borrow.return_book()[0]
+    ok, message = stale.return_book()
+
+    assert not ok
+    assert message == "Only borrowed books can be returned"
+    assert available_copies(db, book.id) == before + 1
+
+
+def test_concurrent_renewal_is_rejected(user, book):
+    borrow, _ = Borrow.create(user.id, book.id)
+    borrow.approve_pickup()
+    stale = fresh(borrow)
+
+    assert borrow.renew()[0]
+    ok, _ = stale.renew()
+
+    assert not ok
+    assert fresh(borrow).renewed_count == 1
+
+
+# ---------- Inventory and counters ----------
+
+def test_create_approve_return_keeps_inventory_consistent(db, user, book):
+    start = available_copies(db, book.id)
+
+    borrow, _ = Borrow.create(user.id, book.id)
+    assert available_copies(db, book.id) == start - 1
+    assert_counters_match(db)
+
+    borrow.approve_pickup()
+    assert available_copies(db, book.id) == start - 1
+    assert_counters_match(db)
+
+    borrow.return_book()
+    assert available_copies(db, book.id) == start
+    assert fresh(borrow).status == 'returned'
+    assert_counters_match(db)
+
+
+def test_create_cancel_keeps_inventory_consistent(db, user, book):
+    start = available_copies(db, book.id)
+    active = Borrow.get_active_borrows_count()
+
+    borrow, _ = Borrow.create(user.id, book.id)
+    assert Borrow.get_active_borrows_count() == active + 1
+
+    borrow.cancel()
+    assert available_copies(db, book.id) == start
+    assert Borrow.get_active_borrows_count() == active
+    assert Book.get_by_id(book.id).available_copies == start
+    assert_counters_match(db)
+
+
+# ---------- Late fees ----------
+
+DUE = datetime(2024, 1, 1, 12, 0, 0)
+GRACE = timedelta(minutes=Config.GRACE_PERIOD_MINUTES)
+HOURLY = Config.LATE_FEE_HOURLY
+DAILY = Config.LATE_FEE_DAILY
+
+
+@pytest.mark.parametrize('delay, expected', [
+    (timedelta(0), 0.0),
+    (-timedelta(hours=1), 0.0),
+    (GRACE - timedelta(seconds=1), 0.0),
+    (GRACE, 0.0),
+    (GRACE + timedelta(seconds=1), 1 * HOURLY),
+    (GRACE + timedelta(minutes=59), 1 * HOURLY),
+    (GRACE + timedelta(hours=1), 1 * HOURLY),
+    (GRACE + timedelta(hours=1, seconds=1), 2 * HOURLY),
+    (GRACE + timedelta(hours=23, minutes=59, seconds=59), 24 * HOURLY),
+    (GRACE + timedelta(hours=24), 1 * DAILY),
+    (GRACE + timedelta(hours=24, seconds=1), 2 * DAILY),
+    (GRACE + timedelta(days=2), 2 * DAILY),
+    (GRACE + timedelta(days=7, minutes=1), 8 * DAILY),
+])
+def test_calculate_late_fee_boundaries(delay, expected):
+    assert Borrow.calculate_late_fee(DUE, DUE + delay) == expected
@@ -3,9 +3,11 @@
 This package contains helper functions, decorators, and utilities
 used across the application.
 """
+from utils.concurrency import run_blocking
 from utils.decorators import login_required, role_required
 
 __all__ = [
+    'run_blocking',
     'login_required',
     'role_required',
 ]
\ No newline at end of file
@@ -0,0 +1,20 @@
+"""Helpers for running blocking work under the SocketIO async mode.
+
+With the default eventlet mode every request, socket and background task
+shares one hub; sqlite3 calls never yield to it.
+"""
+from config.config import Config
+
+
+def run_blocking(func, *args):
+    """Run blocking work (sqlite3 calls) without stalling the event loop.
+
+    Under eventlet, background tasks and scheduler threads are green
+    threads and sqlite3 does not yield, so a slow or locked write would
+    freeze every SocketIO client. The work is handed to eventlet's native
+    thread pool in that case.
+    """
+    if Config.SOCKETIO_ASYNC_MODE == 'eventlet':
+        from eventlet import tpool
+        return tpool.execute(func, *args)
+    return func(*args)
@@ -5,10 +5,7 @@ This module contains decorators for protecting routes and checking user roles.
 from functools import wraps
 from typing import Callable, Tuple
 
-from flask import flash, redirect, request, session, url_for
-
-from models.user import User
-
+from flask import flash, g, redirect, request, session, url_for
 
 def login_required(f: Callable) -> Callable:
     """Decorator to require user login for a route.
@@ -60,18 +57,22 @@ def role_required(*roles: Tuple[str]) -> Callable:
                 flash('Please login to access this page', 'warning')
                 return redirect(url_for('auth.login'))
 
-            user = User.get_by_id(session['user_id'])
-            if not user:
+            # g.user comes from the version-checked session snapshot
+            # (User.load_for_session), so role changes and deleted users
+            # are picked up without a database lookup per request
+            user = g.user
+            if not user.is_authenticated:
                 session.clear()
                 flash('User not found. Please login again.', 'error')
                 return redirect(url_for('auth.login'))
+            role = user.role
 
             # Admin users have access to all routes
-            if user.is_admin():
+            if role == 'admin':
                 return f(*args, **kwargs)
 
             # Check if user has one of the required roles
-            if user.role in roles:
+            if role in roles:
                 return f(*args, **kwargs)
 
             flash('You do not have permission to access this page', 'error')